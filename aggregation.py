@@ -12,7 +12,9 @@
       "hedged": False,                    # True if prediction/hope/snark
       "clean_bonus": 1.1,                 # e.g., short/noisy tweet bonus
       "ts": 1358124338000,                # timestamp_ms (optional)
-      "text": "Anne Hathaway has got me living. #GoldenGlobes"
+      "text_hash": "23eccdb921f65a14",    # extraction.text_key, shared by RT copies (optional)
+      "text": "Anne Hathaway has got me living. #GoldenGlobes",
+      "echo_group": 17, "echo_size": 4,   # near-duplicate group, from assign_echo_groups (optional)
     },
     ...
   ]
@@ -22,8 +24,12 @@
 
 
 # aggregation.py
-from collections import defaultdict, Counter
+from collections import Counter
 from math import exp
+import heapq
+import re
+from tweettime import snowflake_ms
+from sketches import CountMinSketch, HyperLogLog, SpaceSaving, hash64
 
 class AggregationConfig:
     """
@@ -38,6 +44,10 @@ class AggregationConfig:
     DISTINCT_USER_BONUS = 0.05  # per distinct user
     ALIAS_BONUS = 0.03   # per alias (reflects alias consolidation strength)
 
+    # near-duplicate (echo) grouping, see echo_groups
+    ECHO_THRESHOLD = 0.6 # Jaccard similarity of character shingles to count as an echo
+    ECHO_NUM_PERM = 64   # MinHash signature size (more = sharper, slower)
+
     # penalties
     HEDGED_ZERO_OUT = True     # ignore hedged hits entirely
     LONG_TWEET_PENALTY = 0.9   # multiply when clean_bonus < 1.0 (already encoded)
@@ -48,6 +58,20 @@ class AggregationConfig:
     # softmax temperature for confidence
     CONF_TEMPERATURE = 1.0
 
+    # StreamingAggregator memory: per award and role candidate counters, and the
+    # shared sketch behind USER_CAP / RT_DUP_PENALTY
+    STREAM_CAPACITY = 256        # candidates tracked per award and role
+    STREAM_SKETCH_WIDTH = 1 << 20  # 16 MiB at depth 4; collisions grow with hits / width
+    STREAM_SKETCH_DEPTH = 4
+    STREAM_HLL_PRECISION = 8     # 256 registers per candidate, ~6.5% error on distinct users
+    STREAM_CLEAN_STEP = 0.05     # clean_bonus is ranked for USER_CAP in steps of this...
+    STREAM_CLEAN_RANGE = (0.5, 1.5)  # ...clamped to this range, so there are few cap levels
+
+    # OnlineAggregator: live winner calls from hits in timestamp order
+    DECAY_HALF_LIFE_S = 120.0    # a hit's score halves every this many seconds
+    CALL_MARGIN = 0.6            # leader's confidence minus the runner-up's to call a winner
+    CALL_MIN_HITS = 10           # recent (decayed) hits the leader needs before it can be called
+
 def _softmax(xs, T=1.0):
     if not xs: 
         return []
@@ -66,23 +90,647 @@ def _score_hit(hit, cfg: AggregationConfig):
 
 def _dedupe_like_rts(evidence_list):
     """
-    Group by normalized text; return a dict text->count to detect echo/RTs.
+    Group by echo group (assign_echo_groups), else by text_hash when the
+    extractor collapsed retweets already, else by normalized text; return
+    a dict key->count to detect echo/RTs.
+    """
+    return Counter(k for k in map(_echo_key, evidence_list) if k is not None)
+
+def _echo_key(h):
+    # what a hit's text counts as for RT_DUP_PENALTY (None: no text)
+    if h.get("echo_group") is not None:
+        return ("echo", h["echo_group"])
+    return h.get("text_hash") or ' '.join((h.get("text") or '').lower().split()) or None
+
+
+##### near-duplicate (echo) grouping
+ECHO_SHINGLE = 5               # characters per shingle
+ECHO_SEED = 1                  # MinHash hash functions are drawn from this seed
+_ECHO_CHUNK = 1 << 16          # shingles hashed per NumPy pass
+_QUOTE_RT_RE = re.compile(r"\bRT\s+@\w+\s*:?", re.IGNORECASE)
+_NONWORD_RE = re.compile(r"[^\w]+")
+
+def _echo_norm(text):
+    """
+    The part of a tweet that echoes carry over: the text after the last
+    "RT @x:" (so quote-tweets and RT chains reduce to what they quote),
+    without URLs, @handles, trailing hashtags, '#' or punctuation, lowercased.
+    """
+    words = [w for w in _QUOTE_RT_RE.split(text or "")[-1].split()
+             if not w.startswith(("http", "@"))]
+    while words and words[-1].startswith("#"):
+        words.pop()
+    return " ".join(_NONWORD_RE.sub(" ", " ".join(words)).lower().split())
+
+def _lsh_bands(threshold, num_perm):
+    # (bands, rows) with bands * rows <= num_perm whose S-curve midpoint
+    # (1/bands)^(1/rows) is closest to the threshold
+    return min(((num_perm // r, r) for r in range(1, num_perm + 1)),
+               key=lambda br: abs((1.0 / br[0]) ** (1.0 / br[1]) - threshold))
+
+def _minhash(texts, num_perm, seed=ECHO_SEED):
+    """
+    MinHash signatures (len(texts) x num_perm uint32) of the texts' sets of
+    ECHO_SHINGLE-byte shingles (the whole text when shorter), with the
+    multiply-add-shift hashes ((a*x + b) mod 2^64) >> 32 of the shingles.
+    """
+    import numpy as np
+    k = ECHO_SHINGLE
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+    raw = [t.encode("utf-8") for t in texts]
+    lens = np.fromiter(map(len, raw), dtype=np.int64, count=len(raw))
+    buf = np.frombuffer(b"".join(raw) + bytes(k), dtype=np.uint8)
+    # one shingle per position with k bytes left in the text, or the text itself if shorter
+    counts = np.maximum(lens - k + 1, 1)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    pos = np.repeat(np.cumsum(lens) - lens - bounds[:-1], counts) + np.arange(bounds[-1])
+    x = np.zeros(len(pos), dtype=np.uint64)
+    for j in range(k):
+        x = (x << np.uint64(8)) | buf[pos + j]
+    width = np.repeat(np.minimum(lens, k), counts).astype(np.uint64)
+    x = (x >> (np.uint64(8) * (np.uint64(k) - width))) | (width << np.uint64(8 * k))
+    x = (x * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)  # wraps: 32 well-mixed bits
+    sig = np.empty((num_perm, len(texts)), dtype=np.uint32)
+    lo = 0
+    while lo < len(texts):
+        hi = min(len(texts), max(lo + 1, int(np.searchsorted(bounds, bounds[lo] + _ECHO_CHUNK)) - 1))
+        hashed = ((a * x[bounds[lo]:bounds[hi]] + b) >> np.uint64(32)).astype(np.uint32)
+        sig[:, lo:hi] = np.minimum.reduceat(hashed, bounds[lo:hi] - bounds[lo], axis=1)
+        lo = hi
+    return sig.T
+
+def _components(n, src, dst):
+    # connected-component labels (smallest member) of the undirected graph src-dst on range(n)
+    import numpy as np
+    label = np.arange(n)
+    while True:
+        lo = np.minimum(label[src], label[dst])
+        new = label.copy()
+        np.minimum.at(new, src, lo)
+        np.minimum.at(new, dst, lo)
+        new = new[new]  # pointer jumping
+        if np.array_equal(new, label):
+            return label
+        label = new
+
+def echo_groups(texts, threshold=AggregationConfig.ECHO_THRESHOLD, num_perm=AggregationConfig.ECHO_NUM_PERM):
+    """
+    Near-duplicate groups over a whole ceremony's texts, in roughly linear
+    time: texts are normalized (_echo_norm), MinHashed over character
+    shingles and bucketed by LSH bands tuned to the threshold; a text and
+    the first text of a bucket it shares are echoes when their signatures
+    agree on at least threshold of the positions, and groups are the
+    connected components of that.
+
+    Returns (group, size), NumPy arrays parallel to texts: the group id
+    (the index of the group's first text; -1 for texts with nothing left
+    after normalizing) and the number of texts in the group (1 for -1).
     """
-    norm = lambda s: ' '.join((s or '').lower().split())
-    bag = Counter(norm(h.get("text","")) for h in evidence_list if h.get("text"))
-    return bag
+    import numpy as np
+    # retweets repeat texts verbatim: normalize each distinct text once
+    text_ids = {}
+    inverse = np.fromiter((text_ids.setdefault(t, len(text_ids)) for t in texts),
+                          dtype=np.int64, count=len(texts))
+    norm_ids = {}
+    inverse = np.fromiter((norm_ids.setdefault(_echo_norm(t), len(norm_ids)) for t in text_ids),
+                          dtype=np.int64, count=len(text_ids))[inverse]
+    n = len(norm_ids)
+    src = dst = np.zeros(0, dtype=np.int64)
+    if n > 1:
+        sig = _minhash(list(norm_ids), num_perm)
+        bands, rows = _lsh_bands(threshold, num_perm)
+        src, dst = [], []
+        for band in range(bands):
+            key = np.zeros(n, dtype=np.uint64)
+            for col in sig[:, band * rows:(band + 1) * rows].T:
+                key = key * np.uint64(0x100000001B3) + col.astype(np.uint64)  # wraps; collisions only cost a check
+            _, first, bucket = np.unique(key, return_index=True, return_inverse=True)
+            head = first[bucket.ravel()]
+            linked = np.flatnonzero(head != np.arange(n))
+            src.append(linked)
+            dst.append(head[linked])
+        edge = np.unique(np.concatenate(src) * n + np.concatenate(dst))
+        src, dst = edge // n, edge % n
+        similar = (sig[src] == sig[dst]).mean(axis=1) >= threshold
+        src, dst = src[similar], dst[similar]
+    label = _components(n, src, dst)[inverse]
+    if "" in norm_ids:
+        label[inverse == norm_ids[""]] = -1
+    valid = label >= 0
+    first_text = np.full(n, len(texts), dtype=np.int64)
+    np.minimum.at(first_text, label[valid], np.flatnonzero(valid))
+    size = np.bincount(label[valid], minlength=n)
+    return (np.where(valid, first_text[np.maximum(label, 0)], -1),
+            np.where(valid, size[np.maximum(label, 0)], 1))
+
+def assign_echo_groups(hits, cfg: AggregationConfig = AggregationConfig):
+    """
+    Tag each hit with "echo_group" and "echo_size" from echo_groups over
+    the hits' texts; pass the whole ceremony's hits at once so echoes are
+    found across awards. Hits whose text normalizes to nothing get neither.
+    Hits sharing an echo group count as one text for RT_DUP_PENALTY in
+    _dedupe_like_rts and hits_to_columns/score_awards. Returns the hits.
+    """
+    hits = list(hits)
+    group, size = echo_groups([h.get("text") or "" for h in hits], cfg.ECHO_THRESHOLD, cfg.ECHO_NUM_PERM)
+    for h, gid, s in zip(hits, group.tolist(), size.tolist()):
+        if gid >= 0:
+            h["echo_group"] = gid
+            h["echo_size"] = s
+        else:
+            h.pop("echo_group", None)
+            h.pop("echo_size", None)
+    return hits
 
 def _apply_user_cap(evidence_list, cap):
     """
     Limit per-user impact to avoid spam; keep only top-scoring 'cap' hits per user.
     """
-    by_user = defaultdict(list)
-    for h in evidence_list:
-        by_user[h.get("user","?")].append(h)
-    pruned = []
-    for u, hits in by_user.items():
-        # keep up to cap; no scoring yet, so sort by (weight, clean_bonus) proxy
-        hits.sort(key=lambda k: (k.get("weight",1), k.get("clean_bonus",1.0)), reverse=True)
-        pruned.extend(hits[:cap])
-    return pruned
+    return list(iter_user_cap(evidence_list, cap))
+
+def iter_user_cap(evidence, cap):
+    """
+    Streaming _apply_user_cap: while hits arrive, each user keeps a min-heap
+    of its best 'cap' hits by the (weight, clean_bonus) proxy, so memory is
+    O(users * cap) however many hits a bot posts. Once the input is consumed
+    the kept hits are yielded lazily, users in order of first appearance and
+    each user's hits best first, earlier hits first on ties.
+    """
+    heaps = {}  # insertion order = first appearance of the user
+    for seq, h in enumerate(evidence):
+        heap = heaps.setdefault(h.get("user","?"), [])
+        if cap <= 0:
+            continue
+        # (key, -seq): among equal keys the latest hit is the smallest, so it is evicted first
+        entry = ((h.get("weight",1), h.get("clean_bonus",1.0)), -seq, h)
+        if len(heap) < cap:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    for heap in heaps.values():
+        for _, _, h in sorted(heap, key=lambda e: e[:2], reverse=True):
+            yield h
+
+
+def hits_to_columns(hits_by_award):
+    """
+    Flatten {award: {candidate: [hit, ...]}} (hits as in the schema above,
+    e.g. from cluster.Cluster.hits()) into the columns score_awards takes.
+    Awards, candidates, users and text hashes become integer ids
+    ("award_labels"/"candidate_labels" map them back; a missing text_hash
+    is -1). Missing users count as "?" as in _apply_user_cap, and the
+    text_hash column holds what _dedupe_like_rts groups by: the echo group
+    when assign_echo_groups ran, else text_hash, else the normalized text.
+    """
+    import numpy as np
+    ids = {k: {} for k in ("award", "candidate", "user", "text_hash")}
+    cols = {k: [] for k in ("award", "candidate", "kind", "weight", "clean_bonus", "hedged", "user", "text_hash")}
+    for award, by_cand in hits_by_award.items():
+        a = ids["award"].setdefault(award, len(ids["award"]))
+        for cand, hits in by_cand.items():
+            c = ids["candidate"].setdefault(cand, len(ids["candidate"]))
+            for h in hits:
+                cols["award"].append(a)
+                cols["candidate"].append(c)
+                cols["kind"].append(h.get("kind") or "MENTION")
+                cols["weight"].append(h.get("weight", 1))
+                cols["clean_bonus"].append(h.get("clean_bonus", 1.0))
+                cols["hedged"].append(bool(h.get("hedged")))
+                user = h.get("user", "?")
+                cols["user"].append(ids["user"].setdefault(user, len(ids["user"])))
+                th = _echo_key(h)
+                cols["text_hash"].append(-1 if th is None else ids["text_hash"].setdefault(th, len(ids["text_hash"])))
+    out = {k: np.asarray(v, dtype=np.int64) for k, v in cols.items() if k in ids}
+    out["kind"] = np.asarray(cols["kind"], dtype=str)
+    out["weight"] = np.asarray(cols["weight"], dtype=float)
+    out["clean_bonus"] = np.asarray(cols["clean_bonus"], dtype=float)
+    out["hedged"] = np.asarray(cols["hedged"], dtype=bool)
+    out["award_labels"] = list(ids["award"])
+    out["candidate_labels"] = list(ids["candidate"])
+    return out
+
+def _codes(values, labels=None):
+    # dense integer codes for a label column, and how many distinct labels there are
+    import numpy as np
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iu":
+        if labels is not None:
+            return values, len(labels)
+        uniq, codes = np.unique(values, return_inverse=True)
+        return codes.ravel(), len(uniq)
+    seen = {}
+    codes = np.fromiter((seen.setdefault(v, len(seen)) for v in values), dtype=np.int64, count=len(values))
+    return codes, len(seen)
+
+def _stable_order(keys):
+    """
+    Stable argsort by several non-negative integer key columns, most
+    significant first, given as (codes, number of distinct codes). The
+    columns are packed into one int64 key when they fit (one sort instead
+    of np.lexsort's one per column).
+    """
+    import numpy as np
+    span = 1
+    for _, size in keys:
+        span *= max(int(size), 1)
+    if span >= 2 ** 62:
+        return np.lexsort([codes for codes, _ in reversed(keys)])
+    packed = np.zeros(len(keys[0][0]), dtype=np.int64)
+    for codes, size in keys:
+        packed = packed * max(int(size), 1) + codes
+    return np.argsort(packed, kind="stable")
+
+def _dense_rank(values, descending=False):
+    # (dense rank codes, number of distinct values)
+    import numpy as np
+    uniq, codes = np.unique(-values if descending else values, return_inverse=True)
+    return codes.ravel(), len(uniq)
+
+def _first_of_groups(keys):
+    # True at the first element of each run of equal rows in lexsorted key columns
+    import numpy as np
+    first = np.ones(len(keys[0]), dtype=bool)
+    if len(first) > 1:
+        first[1:] = np.any([k[1:] != k[:-1] for k in keys], axis=0)
+    return first
+
+def score_awards(columns, cfg: AggregationConfig = AggregationConfig, alias_counts=None):
+    """
+    Score every candidate of every award in one set of NumPy passes.
+
+    columns: equal-length sequences "candidate", "kind" ("WIN"/"NOM"/other),
+    "weight", "clean_bonus", "hedged", "user", "text_hash" and optionally
+    "award" (one award if absent). Label columns may be lists of hashable
+    values (text_hash "" or None for none) or, as hits_to_columns builds
+    them, integer NumPy arrays of ids (text_hash -1 for none), which skip
+    the Python pass; "award_labels"/"candidate_labels" then name the ids.
+    alias_counts: optional {candidate: number of aliases} for ALIAS_BONUS.
+
+    Per award and candidate: hedged hits are dropped (HEDGED_ZERO_OUT); each
+    user keeps its USER_CAP best hits by (weight, clean_bonus), earlier hits
+    first on ties, as _apply_user_cap does; every hit scores as _score_hit;
+    repeats of a text_hash (an echo group, via hits_to_columns after
+    assign_echo_groups) after its first hit are multiplied by
+    RT_DUP_PENALTY, so a group of s echoes counts 1 + (s-1)*RT_DUP_PENALTY
+    hits; then STRICT_HIT_BONUS per kept hit with weight >= 3,
+    DISTINCT_USER_BONUS per distinct user and ALIAS_BONUS per alias are
+    added. Confidence is the softmax of the scores within the award at
+    CONF_TEMPERATURE.
+
+    Returns {award: [(candidate, score, confidence), ...]}, best first
+    (ties keep the order candidates first appear in).
+    """
+    import numpy as np
+    n = len(columns["candidate"])
+    if not n:
+        return {}
+    award = columns.get("award")
+    if award is None:
+        award = [None] * n
+    a_code, n_awards = _codes(award, columns.get("award_labels"))
+    c_code, n_cands = _codes(columns["candidate"], columns.get("candidate_labels"))
+    u_code, _ = _codes(columns["user"])
+    t_code, _ = _codes(columns["text_hash"])
+    kind = np.asarray(columns["kind"])
+    weight = np.asarray(columns["weight"], dtype=float)
+    clean = np.asarray(columns["clean_bonus"], dtype=float)
+    hedged = np.asarray(columns["hedged"], dtype=bool)
+
+    # (award, candidate) groups, numbered in order of first appearance
+    pair = a_code * n_cands + c_code
+    _, first_idx, g = np.unique(pair, return_index=True, return_inverse=True)
+    g = g.ravel()
+    rank_of = np.empty(len(first_idx), dtype=np.int64)
+    rank_of[np.argsort(first_idx, kind="stable")] = np.arange(len(first_idx))
+    g = rank_of[g]
+    n_groups = len(first_idx)
+    firsts = np.sort(first_idx)
+    group_award = a_code[firsts]
+    cand_values = np.asarray(columns["candidate"], dtype=object)[firsts]
+    award_values = np.asarray(award, dtype=object)[firsts]
+    if "candidate_labels" in columns:
+        cand_values = [columns["candidate_labels"][c] for c in cand_values]
+    if "award_labels" in columns:
+        award_values = [columns["award_labels"][a] for a in award_values]
+
+    keep = ~hedged if cfg.HEDGED_ZERO_OUT else np.ones(n, dtype=bool)
+
+    n_users = int(u_code.max()) + 1
+
+    # per-user cap: order each (group, user) by weight desc, clean_bonus desc, position asc
+    dropped = (~keep).astype(np.int64)
+    order = _stable_order([(dropped, 2), (g, n_groups), (u_code, n_users),
+                           _dense_rank(weight, descending=True), _dense_rank(clean, descending=True)])
+    first = _first_of_groups([dropped[order], g[order], u_code[order]])
+    start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    capped = np.zeros(n, dtype=bool)
+    capped[order] = (np.arange(n) - start) < cfg.USER_CAP
+    keep &= capped
+
+    base = np.where(kind == "WIN", cfg.BASE_WIN, np.where(kind == "NOM", cfg.BASE_NOM, 0.5))
+    score = base * weight * clean
+
+    # echo penalty: every kept repeat of a (group, text_hash) after the first
+    text_hash = columns["text_hash"]
+    if isinstance(text_hash, np.ndarray) and text_hash.dtype.kind in "iu":
+        has_text = text_hash >= 0
+    else:
+        text_hash = np.asarray(text_hash, dtype=object)
+        has_text = np.not_equal(text_hash, None) & np.not_equal(text_hash, "")
+    skip = (~(keep & has_text)).astype(np.int64)
+    t_code = np.where(has_text, t_code, 0)
+    order = _stable_order([(skip, 2), (g, n_groups), (t_code, int(t_code.max()) + 1)])
+    first = _first_of_groups([skip[order], g[order], t_code[order]])
+    repeat = np.zeros(n, dtype=bool)
+    repeat[order] = ~first
+    score = np.where(keep & has_text & repeat, score * cfg.RT_DUP_PENALTY, score)
+
+    total = np.bincount(g, weights=np.where(keep, score, 0.0), minlength=n_groups)
+    strict = np.bincount(g, weights=keep & (weight >= 3), minlength=n_groups)
+    gu = np.unique(g[keep] * n_users + u_code[keep])
+    users = np.bincount(gu // n_users, minlength=n_groups)
+    total += cfg.STRICT_HIT_BONUS * strict + cfg.DISTINCT_USER_BONUS * users
+    if alias_counts:
+        total += cfg.ALIAS_BONUS * np.array([alias_counts.get(c, 0) for c in cand_values], dtype=float)
+
+    # softmax within each award
+    top = np.full(n_awards, -np.inf)
+    np.maximum.at(top, group_award, total)
+    e = np.exp((total - top[group_award]) / max(cfg.CONF_TEMPERATURE, 1e-6))
+    conf = e / np.bincount(group_award, weights=e)[group_award]
+
+    out = {}
+    for k in np.lexsort((np.arange(n_groups), -total, group_award)):
+        out.setdefault(award_values[k], []).append((cand_values[k], float(total[k]), float(conf[k])))
+    return out
+
+
+class StreamingAggregator:
+    """
+    score_awards over a stream of hits in fixed memory, whatever its length.
+
+    Per award and role (hit kind: WIN, NOM or MENTION) a SpaceSaving keeps
+    the STREAM_CAPACITY heaviest candidates by summed hit score, each with a
+    HyperLogLog of its users (DISTINCT_USER_BONUS) and its strict-hit count;
+    long-tail names come and go in the few smallest counters. result()
+    ranks an award over all of its roles, as score_awards does (summed
+    scores and strict hits, merged user sketches), or over one role. One
+    CountMinSketch counts (award,
+    candidate, text) for RT_DUP_PENALTY and holds, per (award, candidate,
+    user), how many of the user's hits are kept at each (weight,
+    clean_bonus, kind) level, so a better hit displaces the worst of the
+    user's USER_CAP kept hits as in _apply_user_cap. clean_bonus is bucketed
+    to STREAM_CLEAN_STEP within STREAM_CLEAN_RANGE for these levels, so
+    there is a fixed number of them however many values the stream carries.
+
+    Against score_awards: hits in the same clean_bonus bucket rank as ties
+    for USER_CAP; a displaced hit's score is taken back without its echo
+    penalty and at its bucket's clean_bonus, and its text stays "seen" for
+    RT_DUP_PENALTY; sketch collisions can only drop or penalize a hit, at a
+    rate that grows with hits / STREAM_SKETCH_WIDTH; distinct users are
+    estimated; and a candidate's score overestimates the truth by at most
+    the errors its role counters report, and misses at most a role's total /
+    STREAM_CAPACITY for each role it is not tracked in, so in all it is off
+    by at most the award's total / STREAM_CAPACITY.
+    """
+    def __init__(self, cfg: AggregationConfig = AggregationConfig):
+        self.cfg = cfg
+        self._roles = {}  # (award, kind) -> SpaceSaving of candidates, payload [users HLL, strict hits]
+        self._seen = CountMinSketch(cfg.STREAM_SKETCH_WIDTH, cfg.STREAM_SKETCH_DEPTH)
+        self._levels = {}  # (weight, bucketed clean_bonus, kind) -> hash salt, best first
+
+    def _counters(self, award, kind):
+        counters = self._roles.get((award, kind))
+        if counters is None:
+            hll = lambda: [HyperLogLog(self.cfg.STREAM_HLL_PRECISION), 0]
+            counters = self._roles[award, kind] = SpaceSaving(self.cfg.STREAM_CAPACITY, hll)
+        return counters
+
+    def _level(self, weight, clean, kind):
+        # the cap level of a hit: clean_bonus bucketed so the levels stay few
+        step = self.cfg.STREAM_CLEAN_STEP
+        lo, hi = self.cfg.STREAM_CLEAN_RANGE
+        return weight, round(round(min(max(clean, lo), hi) / step) * step, 6), kind
+
+    def _level_salt(self, level):
+        if level not in self._levels:
+            self._levels[level] = hash64(level)
+            self._levels = dict(sorted(self._levels.items(), key=lambda kv: kv[0][:2], reverse=True))
+        return self._levels[level]
+
+    def _displace(self, h, award, candidate, key):
+        """
+        With the user's USER_CAP hits kept, make room for a hit ranked key
+        (weight, bucketed clean_bonus): False if that many kept hits are at
+        least as good, else take back the worst kept hit (the latest of the
+        worst level in _apply_user_cap) and return True.
+        """
+        seen, cap = self._seen, self.cfg.USER_CAP
+        ahead = 0
+        for level, salt in self._levels.items():
+            if level[:2] < key:
+                break
+            ahead += seen.estimate_hash(h ^ salt)
+            if ahead >= cap:
+                return False
+        for level, salt in reversed(self._levels.items()):
+            if seen.estimate_hash(h ^ salt) > 0:
+                break
+        else:
+            return True  # collisions hid the kept hits
+        seen.add_hash(h ^ salt, -1)
+        weight, clean, kind = level
+        payload = self._counters(award, kind).adjust(
+            candidate, -_score_hit({"kind": kind, "weight": weight, "clean_bonus": clean}, self.cfg))
+        if payload is not None and weight >= 3:
+            payload[1] -= 1
+        return True
+
+    def add(self, award, candidate, hit):
+        """Count one hit (as in the schema above) for candidate under award."""
+        cfg = self.cfg
+        if cfg.HEDGED_ZERO_OUT and hit.get("hedged"):
+            return
+        kind = hit.get("kind") or "MENTION"
+        weight, clean = hit.get("weight", 1), hit.get("clean_bonus", 1.0)
+        level = self._level(weight, clean, kind)
+        salt = self._level_salt(level)
+        user = hit.get("user", "?")
+        h = hash64(("user", award, candidate, user))
+        if self._seen.estimate_hash(h) >= cfg.USER_CAP:
+            if not self._displace(h, award, candidate, level[:2]):
+                return
+        else:
+            self._seen.add_hash(h)  # h alone counts the user's kept hits
+        self._seen.add_hash(h ^ salt)
+
+        score = _score_hit(hit, cfg)
+        text = _echo_key(hit)
+        if text is not None and self._seen.add(("text", award, candidate, text)) > 0:
+            score *= cfg.RT_DUP_PENALTY
+        users, _ = payload = self._counters(award, kind).add(candidate, score)
+        users.add(user)
+        payload[1] += weight >= 3
+
+    def update(self, hits_by_award):
+        """add() every hit of {award: {candidate: [hit, ...]}}."""
+        for award, by_cand in hits_by_award.items():
+            for cand, hits in by_cand.items():
+                for h in hits:
+                    self.add(award, cand, h)
+
+    def result(self, alias_counts=None, role=None):
+        """
+        {award: [(candidate, score, confidence), ...]} as score_awards
+        returns it, over the candidates still tracked; with role (a hit
+        kind), over that role's hits only.
+        """
+        cfg = self.cfg
+        merged = {}  # award -> {candidate: [score, users HLL, strict hits]}
+        for (award, kind), counters in self._roles.items():
+            if role is not None and kind != role:
+                continue
+            by_cand = merged.setdefault(award, {})
+            for cand, score, _, (users, strict) in counters.items():
+                row = by_cand.get(cand)
+                if row is None:
+                    row = by_cand[cand] = [0.0, HyperLogLog(cfg.STREAM_HLL_PRECISION), 0]
+                row[0] += score
+                row[1].merge(users)
+                row[2] += strict
+        out = {}
+        for award, by_cand in merged.items():
+            rows = [(cand, score + cfg.STRICT_HIT_BONUS * strict + cfg.DISTINCT_USER_BONUS * users.count()
+                     + cfg.ALIAS_BONUS * (alias_counts or {}).get(cand, 0))
+                    for cand, (score, users, strict) in by_cand.items()]
+            confs = _softmax([t for _, t in rows], cfg.CONF_TEMPERATURE)
+            out[award] = sorted(((c, t, p) for (c, t), p in zip(rows, confs)), key=lambda r: -r[1])
+        return out
+
+
+def hit_ts(hit):
+    """A hit's timestamp_ms: its "ts", else the time in its snowflake tweet_id, else None."""
+    ts = hit.get("ts")
+    return ts if ts is not None else snowflake_ms(hit.get("tweet_id"))
+
+def iter_hits_by_time(hits_by_award):
+    """
+    (award, candidate, hit) for every hit of {award: {candidate: [hit, ...]}},
+    oldest first; hits without a timestamp come last, so OnlineAggregator
+    counts them at the latest time seen.
+    """
+    flat = [(award, cand, h, hit_ts(h)) for award, by_cand in hits_by_award.items()
+            for cand, hits in by_cand.items() for h in hits]
+    flat.sort(key=lambda r: (r[3] is None, r[3] or 0))
+    return ((award, cand, h) for award, cand, h, _ in flat)
+
+class OnlineAggregator:
+    """
+    Live scoring for a replayed or tailed stream: feed hits in timestamp
+    order and get a "winner called" event as soon as an award has a clear
+    leader, instead of scoring the whole night at the end.
+
+    Each candidate's score is the sum of its hits' _score_hit, each decayed
+    by half every DECAY_HALF_LIFE_S seconds since the hit, so the burst
+    after an announcement outweighs the nominee chatter before it. Hedged
+    hits are dropped, and repeated texts (_echo_key) score RT_DUP_PENALTY,
+    counted in a CountMinSketch as in StreamingAggregator. Each user counts
+    for its best USER_CAP hits per award and candidate by (weight,
+    clean_bonus), as in _apply_user_cap: a better hit displaces the worst
+    one kept (the latest on ties), whose decayed score and hit are taken
+    back; its text stays "seen". The kept hits are held exactly, so memory
+    grows with the (award, candidate, user) triples, USER_CAP hits each.
+    An award is called when the softmax (CONF_TEMPERATURE) of its
+    decayed scores puts the leader CALL_MARGIN ahead of the runner-up and
+    the leader has CALL_MIN_HITS recent hits (hits decayed the same way);
+    it is called again only if another candidate later clears the same bar.
+
+    Hits without a timestamp (hit_ts) count at the latest time seen.
+    """
+    def __init__(self, cfg: AggregationConfig = AggregationConfig):
+        self.cfg = cfg
+        self.now = None   # timestamp_ms of the latest hit
+        self.calls = {}   # award -> latest "winner called" event
+        self._scores = {}  # award -> {candidate: [decayed score, as of ts, decayed hit count]}
+        self._seen = CountMinSketch(cfg.STREAM_SKETCH_WIDTH, cfg.STREAM_SKETCH_DEPTH)
+        self._kept = {}    # (award, candidate, user) -> min-heap of ((weight, clean_bonus), -seq, score, ts)
+        self._seq = 0
+
+    def _decay(self, dt_ms):
+        return 0.5 ** (max(dt_ms, 0) / (1000.0 * self.cfg.DECAY_HALF_LIFE_S))
+
+    def scores(self, award, at=None):
+        """{candidate: score} for award, decayed to `at` (default: now)."""
+        at = self.now if at is None else at
+        return {c: s * self._decay(at - t) for c, (s, t, _) in self._scores.get(award, {}).items()}
+
+    def add(self, award, candidate, hit):
+        """
+        Ingest one hit for candidate under award. Returns the "winner called"
+        event this hit triggers, else None: {"award", "winner", "confidence",
+        "margin", "hits" (the winner's decayed hit count), "ts"}.
+        """
+        cfg = self.cfg
+        ts = hit_ts(hit)
+        if ts is not None and (self.now is None or ts > self.now):
+            self.now = ts
+        ts = self.now if ts is None else ts
+        if ts is None or (cfg.HEDGED_ZERO_OUT and hit.get("hedged")) or cfg.USER_CAP <= 0:
+            return None
+        kept = self._kept.setdefault((award, candidate, hit.get("user", "?")), [])
+        self._seq += 1
+        # (key, -seq): among equal keys the latest hit is the smallest, so it is displaced first
+        rank = ((hit.get("weight", 1), hit.get("clean_bonus", 1.0)), -self._seq)
+        if len(kept) >= cfg.USER_CAP and rank <= kept[0][:2]:
+            return None
+        score = _score_hit(hit, cfg)
+        text = _echo_key(hit)
+        if text is not None and self._seen.add(("text", award, candidate, text)) > 0:
+            score *= cfg.RT_DUP_PENALTY
+
+        by_cand = self._scores.setdefault(award, {})
+        entry = by_cand.setdefault(candidate, [0.0, ts, 0.0])
+        old, new = self._decay(ts - entry[1]), self._decay(entry[1] - ts)
+        entry[0] = entry[0] * old + score * new
+        entry[2] = entry[2] * old + new
+        entry[1] = max(entry[1], ts)
+        if len(kept) < cfg.USER_CAP:
+            heapq.heappush(kept, (*rank, score, ts))
+        else:
+            _, _, out_score, out_ts = heapq.heapreplace(kept, (*rank, score, ts))
+            out = self._decay(entry[1] - out_ts)
+            entry[0] -= out_score * out
+            entry[2] -= out
+        return self._maybe_call(award)
+
+    def _maybe_call(self, award):
+        cfg = self.cfg
+        scores = self.scores(award)
+        top = heapq.nlargest(2, scores.items(), key=lambda kv: kv[1])
+        leader, best = top[0]
+        _, as_of, hits = self._scores[award][leader]
+        hits *= self._decay(self.now - as_of)
+        if hits < cfg.CALL_MIN_HITS:
+            return None
+        call = self.calls.get(award)
+        if call is not None and call["winner"] == leader:
+            return None
+        # softmax confidences of the leader and the runner-up
+        T = max(cfg.CONF_TEMPERATURE, 1e-6)
+        z = sum(exp((v - best) / T) for v in scores.values())
+        confidence = 1.0 / z
+        margin = confidence - (exp((top[1][1] - best) / T) / z if len(top) > 1 else 0.0)
+        if margin < cfg.CALL_MARGIN:
+            return None
+        event = {"award": award, "winner": leader, "confidence": confidence, "margin": margin,
+                 "hits": hits, "ts": self.now}
+        self.calls[award] = event
+        return event
 
+    def run(self, stream):
+        """Feed (award, candidate, hit) triples in order (e.g. iter_hits_by_time); yield each event."""
+        for award, cand, hit in stream:
+            event = self.add(award, cand, hit)
+            if event is not None:
+                yield event
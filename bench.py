@@ -0,0 +1,1181 @@
+'''
+Micro-benchmarks for the tweet pipeline.
+
+Usage:
+    python bench.py              # run everything
+    python bench.py import       # run only the named benchmarks
+'''
+import sys
+import json
+import subprocess
+import time
+
+SAMPLE_PATH = "sample_text.json"
+
+# cold start: importing the pipeline modules must not load spaCy, read the
+# corpus or run any stage; this is the budget for doing so (milliseconds)
+IMPORT_BUDGET_MS = 50
+COLD_START_MODULES = ["extraction", "frame", "cluster", "aggregation", "gg_api"]
+
+_COLD_START_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+import {modules}
+elapsed = (time.perf_counter() - t0) * 1000
+import extraction
+heavy = [m for m in ("spacy", "ftfy", "tqdm") if m in sys.modules]
+print(elapsed, int(extraction.PIPELINE.is_loaded()), ",".join(heavy))
+"""
+
+
+def bench_import(runs=5):
+    '''Cold-start import time of the pipeline modules, in a fresh interpreter each run.'''
+    snippet = _COLD_START_SNIPPET.format(modules=", ".join(COLD_START_MODULES))
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", snippet],
+                             capture_output=True, text=True, check=True).stdout.split()
+        elapsed, loaded = float(out[0]), out[1] == "1"
+        heavy = out[2] if len(out) > 2 else ""
+        if loaded or heavy:
+            raise AssertionError(f"import has side effects: model loaded={loaded}, heavy modules={heavy}")
+        times.append(elapsed)
+    best = min(times)
+    print(f"import {', '.join(COLD_START_MODULES)}: best {best:.1f} ms, "
+          f"median {sorted(times)[len(times) // 2]:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    return best <= IMPORT_BUDGET_MS
+
+
+def _sample_texts(repeat=1):
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        texts = [t.get("text") or "" for t in json.load(f)]
+    return texts * repeat
+
+
+def bench_ner(repeat=10):
+    '''Per-tweet NER with the full pipeline vs. batched nlp.pipe with only NER enabled.'''
+    import extraction
+    try:
+        pruned = extraction.PIPELINE.nlp
+    except (ImportError, OSError) as e:
+        print(f"skipped: cannot load {extraction.PIPELINE.model_name} ({e})")
+        return True
+    import spacy
+    full = spacy.load(extraction.PIPELINE.model_name)
+    cleaned = [extraction.clean_tweets(t) for t in _sample_texts(repeat)]
+
+    # NER alone, plus the shared tok2vec only when ner listens to it
+    keep = set(extraction.NER_PIPES)
+    if "tok2vec" in full.pipe_names:
+        listeners = getattr(full.get_pipe("tok2vec"), "listening_components", [])
+        if any(name in listeners for name in extraction.NER_PIPES):
+            keep.add("tok2vec")
+    pipes_ok = set(pruned.pipe_names) == keep
+
+    t0 = time.perf_counter()
+    expected = [extraction._people_from_doc(full(t)) for t in cleaned]
+    serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = list(extraction.iter_people(cleaned))
+    batched = time.perf_counter() - t0
+
+    sample = cleaned[:200]
+    one_by_one = [extraction.extract_people(t) for t in sample]
+    print(f"{len(cleaned)} tweets: per-tweet full pipeline {len(cleaned) / serial:.0f} tweets/s, "
+          f"batched NER-only {len(cleaned) / batched:.0f} tweets/s ({serial / batched:.1f}x), "
+          f"pipes kept: {pruned.pipe_names} (expected {sorted(keep)})")
+    print(f"people: batched vs full pipeline {'same' if got == expected else 'DIFFERENT'}, "
+          f"batched vs extract_people on {len(sample)} tweets {'same' if got[:len(sample)] == one_by_one else 'DIFFERENT'}")
+    return pipes_ok and got == expected and got[:len(sample)] == one_by_one
+
+
+AWARD_SPEEDUP_TARGET = 10.0
+
+
+def _find_best_award_loop(window_text, awards):
+    '''The original nested prefix x award Levenshtein loop, kept as the baseline.'''
+    import re
+    from Levenshtein import distance as levenshtein_distance
+    window_text = re.sub(r'["""]', '', window_text)
+    window_text = re.sub(r'\s+', ' ', window_text).strip()
+    best_match = None
+    best_distance = float('inf')
+    words = window_text.split()
+    for end in range(2, min(15, len(words)+1)):
+        candidate = " ".join(words[:end])
+        for award in awards:
+            dist = levenshtein_distance(award.lower(), candidate.lower())
+            if dist < best_distance:
+                best_distance = dist
+                best_match = award
+    return best_match, best_distance
+
+
+def _award_windows(n=2000, seed=0):
+    '''"Best ..." windows: the sample tweets' own phrases plus perturbed award names.'''
+    import random
+    import re
+    import frame
+    from extraction import clean_tweets
+    rng = random.Random(seed)
+    phrase_re = re.compile(r"[Bb]est [A-Za-z0-9 &'()-]{2,80}")
+    windows = [m.group(0) for t in _sample_texts() for m in phrase_re.finditer(clean_tweets(t))]
+    tails = ["goes to", "is Anne Hathaway", "#GoldenGlobes", "at the globes tonight", ""]
+    while len(windows) < n:
+        words = rng.choice(frame.AWARD_NAMES).split()
+        if rng.random() < 0.5:
+            del words[rng.randrange(1, len(words))]
+        text = " ".join(words + [rng.choice(tails)])
+        if rng.random() < 0.5:
+            i = rng.randrange(len(text))
+            text = text[:i] + text[i + 1:]
+        windows.append(text if rng.random() < 0.7 else text.lower())
+    return windows[:n]
+
+
+def bench_award():
+    '''AwardMatcher against the original Levenshtein loop on the same windows.'''
+    import frame
+    windows = _award_windows()
+    prepared = [frame._normalize_window(w) for w in windows]
+    cutoff = frame.MAX_LEVENSHTEIN_DISTANCE
+
+    t0 = time.perf_counter()
+    expected = [_find_best_award_loop(w, frame.AWARD_NAMES) for w in windows]
+    loop = time.perf_counter() - t0
+
+    # exact mode must reproduce the loop's match and distance everywhere
+    if frame.AWARD_MATCHER.best_many(prepared) != expected:
+        raise AssertionError("AwardMatcher disagrees with the reference loop")
+    # with the cutoff find_best_award uses, everything within it must agree
+    within = [(m, d) if d <= cutoff else (None, float('inf')) for m, d in expected]
+
+    t0 = time.perf_counter()
+    got = [frame.AWARD_MATCHER.best(w, cutoff) for w in prepared]
+    single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got_many = frame.AWARD_MATCHER.best_many(prepared, cutoff)
+    batched = time.perf_counter() - t0
+
+    if got != within or got_many != within:
+        raise AssertionError("AwardMatcher with a cutoff disagrees with the reference loop")
+
+    # the ticket path (_tickets_for_chunk): each chunk's windows resolved by
+    # prewarm_award_cache, then looked up one by one, starting from an empty cache
+    saved = frame.AWARD_CACHE
+    frame.AWARD_CACHE = frame.AwardCache()
+    try:
+        t0 = time.perf_counter()
+        for lo in range(0, len(prepared), frame.TICKET_CHUNK_SIZE):
+            chunk = prepared[lo:lo + frame.TICKET_CHUNK_SIZE]
+            frame.prewarm_award_cache(chunk, cutoff)
+            for w in chunk:
+                frame.find_best_award(w, cutoff)
+        tickets = time.perf_counter() - t0
+    finally:
+        frame.AWARD_CACHE = saved
+
+    print(f"{len(windows)} windows: loop {loop * 1e6 / len(windows):.0f} us/window, "
+          f"one window per call {single * 1e6 / len(windows):.1f} us/window ({loop / single:.1f}x), "
+          f"batched {batched * 1e6 / len(windows):.1f} us/window ({loop / batched:.1f}x), "
+          f"ticket path {tickets * 1e6 / len(windows):.1f} us/window ({loop / tickets:.1f}x) "
+          f"(target {AWARD_SPEEDUP_TARGET:.0f}x batched and on the ticket path)")
+    return min(loop / batched, loop / tickets) >= AWARD_SPEEDUP_TARGET
+
+
+def bench_cache():
+    '''frame.AwardCache counters on the ticket path, on plain lookups, under eviction and after save/load.'''
+    import os
+    import random
+    import tempfile
+    import frame
+    cutoff = frame.MAX_LEVENSHTEIN_DISTANCE
+    windows = [frame._normalize_window(w) for w in _award_windows()]
+    lookups = windows * 3
+    random.Random(0).shuffle(lookups)
+    distinct = list(dict.fromkeys(lookups))
+    saved = frame.AWARD_CACHE
+    ok = True
+    try:
+        # the ticket path: each chunk prewarmed (a miss per new window), then every lookup a hit
+        cache = frame.AWARD_CACHE = frame.AwardCache()
+        t0 = time.perf_counter()
+        for lo in range(0, len(lookups), frame.TICKET_CHUNK_SIZE):
+            chunk = lookups[lo:lo + frame.TICKET_CHUNK_SIZE]
+            frame.prewarm_award_cache(chunk, cutoff)
+            for w in chunk:
+                frame.find_best_award(w, cutoff)
+        cold = time.perf_counter() - t0
+        ticket_path = cache.stats()
+        ok = ok and (ticket_path["misses"], ticket_path["hits"]) == (len(distinct), len(lookups))
+
+        # lookups alone: the first of each window misses
+        cache = frame.AWARD_CACHE = frame.AwardCache()
+        for w in lookups:
+            frame.find_best_award(w, cutoff)
+        plain = cache.stats()
+        ok = ok and (plain["misses"], plain["hits"]) == (len(distinct), len(lookups) - len(distinct))
+
+        # two passes over every window through an LRU half their size: nothing is ever still there
+        cache = frame.AWARD_CACHE = frame.AwardCache(len(distinct) // 2)
+        for w in distinct * 2:
+            frame.find_best_award(w, cutoff)
+        small = cache.stats()
+        ok = ok and small["hits"] == 0 and small["evictions"] == 2 * len(distinct) - cache.maxsize \
+            and small["size"] == cache.maxsize
+
+        # a cache saved and loaded again answers every window without a miss
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "awards.json")
+            frame.AWARD_CACHE = frame.AwardCache()
+            for w in distinct:
+                frame.find_best_award(w, cutoff)
+            frame.AWARD_CACHE.save(path)
+            cache = frame.AWARD_CACHE = frame.AwardCache()
+            loaded = cache.load(path)
+        t0 = time.perf_counter()
+        for w in lookups:
+            frame.find_best_award(w, cutoff)
+        warm = time.perf_counter() - t0
+        reloaded = cache.stats()
+        ok = ok and loaded == len(distinct) and (reloaded["misses"], reloaded["hits"]) == (0, len(lookups))
+    finally:
+        frame.AWARD_CACHE = saved
+
+    print(f"{len(lookups)} lookups of {len(distinct)} windows: ticket path hits {ticket_path['hits']} "
+          f"misses {ticket_path['misses']} ({cold * 1e6 / len(lookups):.1f} us/lookup); lookups alone "
+          f"hits {plain['hits']} misses {plain['misses']}; half-size LRU evictions {small['evictions']}; "
+          f"saved and loaded {loaded}, then hits {reloaded['hits']} misses {reloaded['misses']} "
+          f"({warm * 1e6 / len(lookups):.1f} us/lookup)")
+    return ok
+
+
+MATCHER_TWEETS = 3000
+_MATCHER_TEMPLATES = ["{name} wins {award}!", "{award} goes to {name} #GoldenGlobes", "{name} takes home {award}",
+                      "{name} nominated for {award}", "{name} is up for {award} tonight", "{name} presents {award}",
+                      "{name} and {other} presenting {award}", "{name} hosts the show", "{name} hosted last year",
+                      "RT @GoldenGlobes: {name} wins {award}", "hoping {name} gets {award} over {other}",
+                      "{name} looks amazing tonight", "{name} and {other} on the red carpet", "{name} won",
+                      "so happy for {name}!!! #GoldenGlobes", "{name}'s speech {award}"]
+
+
+def _matcher_tweets(n=MATCHER_TWEETS, seed=0):
+    '''
+    n raw tweets for the ticket-path checks: the sample tweets, then award
+    talk (wins, nominations, presenters, hosts, chatter with no keyword at
+    all) about the shards people, some shouted, some with accents or
+    fullwidth letters that clean_tweets transliterates.
+    '''
+    import random
+    import frame
+    rng = random.Random(seed)
+    texts = _sample_texts()
+    while len(texts) < n:
+        name, other = (f"{rng.choice(CLUSTER_FIRSTS)} {rng.choice(CLUSTER_LASTS)}" for _ in range(2))
+        text = rng.choice(_MATCHER_TEMPLATES).format(name=name, other=other, award=rng.choice(frame.AWARD_NAMES))
+        r = rng.random()
+        if r < 0.1:
+            text = text.upper()
+        elif r < 0.15:
+            text = text.replace("e", "\u00e9")
+        elif r < 0.2:
+            text = text.replace("Best", "\uff22\uff45\uff53\uff54")
+        texts.append(text)
+    return texts[:n]
+
+
+def _name_ngrams(text, longest=3):
+    '''Every run of 1..longest words in text, as the names a tweet could be asked about.'''
+    import re
+    words = re.findall(r"[^\W\d_][\w'.-]*", text)
+    return list(dict.fromkeys(" ".join(words[i:i + k]) for k in range(1, longest + 1)
+                              for i in range(len(words) - k + 1)))
+
+
+def bench_prefilter():
+    '''frame.Prefilter: a tweet it drops gets no category for any name, so dropping it never changes the tickets.'''
+    import frame
+    from extraction import clean_tweets, strip_retweet
+    texts = _matcher_tweets()
+    prefilter = frame.Prefilter()
+    t0 = time.perf_counter()
+    kept = [prefilter(t) for t in texts]
+    elapsed = time.perf_counter() - t0
+    checks = wrong = 0
+    for text, passed in zip(texts, kept):
+        if passed:
+            continue
+        cleaned = clean_tweets(strip_retweet(text))
+        matcher = frame.TweetMatcher(cleaned)
+        for name in _name_ngrams(cleaned):
+            checks += 1
+            wrong += matcher.category(name) != (None, None)
+    stats = prefilter.stats()
+    print(f"{stats['seen']} tweets: {elapsed * 1e6 / len(texts):.1f} us/tweet, {stats['passed']} passed "
+          f"({stats['selectivity']:.0%}); {checks} names in the {stats['skipped']} dropped tweets, "
+          f"{wrong} of them with a category")
+    return wrong == 0
+
+
+def bench_matcher():
+    '''frame.TweetMatcher against the per-name regex scan (_category_by_regex) on every name in every tweet.'''
+    import frame
+    from extraction import clean_tweets, strip_retweet
+    cleaned = [clean_tweets(strip_retweet(t)) for t in _matcher_tweets()]
+    names = [_name_ngrams(t) for t in cleaned]
+    frame.prewarm_award_cache(m.group(0) for t in cleaned for m in frame.BEST_PHRASE_RE.finditer(t))
+
+    t0 = time.perf_counter()
+    expected = [[frame._category_by_regex(n, t, t.lower()) for n in ns] for t, ns in zip(cleaned, names)]
+    regex = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = []
+    for t, ns in zip(cleaned, names):
+        matcher = frame.TweetMatcher(t)
+        got.append([matcher.category(n) for n in ns])
+    single = time.perf_counter() - t0
+
+    checks = sum(len(ns) for ns in names)
+    wrong = sum(a != b for e, g in zip(expected, got) for a, b in zip(e, g))
+    found = sum(c != (None, None) for e in expected for c in e)
+    print(f"{len(cleaned)} tweets, {checks} names ({found} with a category): per-name regex "
+          f"{regex * 1e6 / checks:.1f} us/name, TweetMatcher {single * 1e6 / checks:.1f} us/name "
+          f"({regex / single:.1f}x), {wrong} disagree")
+    return wrong == 0
+
+
+RESUME_TWEETS = 6000
+RESUME_CRASHES = [(1700,), (3100, 5200), (5900,)]  # tweets read when a run dies; a tuple is one run after another
+
+
+class _Crash(Exception):
+    pass
+
+
+def _crashing(records, at):
+    for i, r in enumerate(records):
+        if i == at:
+            raise _Crash
+        yield r
+
+
+def bench_resume():
+    '''frame.run_tickets interrupted and resumed from its checkpoint gives exactly the uninterrupted output.'''
+    import os
+    import re
+    import tempfile
+    import frame
+    import sinks
+    from extraction import clean_tweets, collapse_retweets
+    from nercache import NERCache
+    records = [{"text": t, "id": 290000000000000000 + i, "user": f"user{i % 997}", "timestamp_ms": 1358121600000 + i}
+               for i, t in enumerate(_matcher_tweets(RESUME_TWEETS, seed=1))]
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        # every text analysed up front, so the runs below never need the spaCy model
+        # (PERSON spans stand in for NER: every "First Last" pair of capitalised words)
+        cache = NERCache(os.path.join(tmp, "ner.sqlite"), version="bench")
+        groups, _ = collapse_retweets(records)
+        analyses = []
+        for g in groups:
+            cleaned = clean_tweets(g["text"])
+            analyses.append((cleaned, [(m.start(), m.end(), "PERSON")
+                                       for m in re.finditer(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b", cleaned)]))
+        cache.put_many([g["key"] for g in groups], analyses)
+
+        def read(sink):
+            paths = [sink.path] if isinstance(sink, sinks.JsonlSink) else sink._shards()
+            lines = []
+            for path in paths:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines.extend(f)
+            return lines
+
+        t0 = time.perf_counter()
+        expected = read(frame.run_tickets(records, sinks.JsonlSink(os.path.join(tmp, "ref.jsonl")),
+                                          cache=cache, report_every=None))
+        elapsed = time.perf_counter() - t0
+        ok = ok and expected == [json.dumps(t) + "\n" for t in frame.get_tickets(records, cache=cache)]
+
+        runs = 0
+        for crashes in RESUME_CRASHES:
+            for make in (lambda: sinks.JsonlSink(os.path.join(tmp, "out.jsonl")),
+                         lambda: sinks.ShardedJsonlSink(os.path.join(tmp, "shards"), shard_size=700)):
+                checkpoint = os.path.join(tmp, "checkpoint.json")
+                for at in crashes:
+                    try:
+                        frame.run_tickets(_crashing(records, at), make(), checkpoint=checkpoint,
+                                          checkpoint_every=2, cache=cache, report_every=None)
+                        ok = False  # the run was meant to die
+                    except _Crash:
+                        runs += 1
+                got = read(frame.run_tickets(records, make(), checkpoint=checkpoint, checkpoint_every=2,
+                                             cache=cache, report_every=None))
+                ok = ok and got == expected
+                os.remove(checkpoint)
+        ner = cache.misses
+        cache.close()
+    print(f"{len(records)} tweets, {len(expected)} tickets in {elapsed:.2f} s; {runs} interrupted runs resumed "
+          f"into JSONL and sharded sinks, output {'identical' if ok else 'DIFFERENT'} to the uninterrupted run "
+          f"({ner} texts missed the NER cache)")
+    return ok and ner == 0
+
+
+CLUSTER_FIRSTS = ["Anne", "Amy", "Ben", "Daniel", "Kevin", "Kerry", "Tina", "Jennifer", "Christoph", "Adele",
+                  "Jessica", "Hugh", "Bill", "Claire", "Julianne", "Don", "Lena", "Sofia", "Leonardo", "Quentin"]
+CLUSTER_LASTS = ["Hathaway", "Poehler", "Affleck", "Day Lewis", "Costner", "Washington", "Fey", "Lawrence",
+                 "Waltz", "Chastain", "Jackman", "Clinton", "Danes", "Moore", "Cheadle", "Dunham", "Vergara",
+                 "Dicaprio", "Tarantino", "Jones", "Boleyn", "Adkins"]
+
+
+def _cluster_tickets(n, seed=0):
+    '''
+    Synthetic cluster.py tickets: 120 people drawn from shared first and last
+    names (so "Anne Hathaway" and "Anne Boleyn" both exist), mentioned with
+    skewed popularity as "First Last", lowercase, "First Last WINS", "RT First
+    Last", hashtags, handles, bare last names, initials and typos, plus
+    one-off noise names; every ticket has its own id and a user.
+    Returns (tickets, {surface: person}) for the person-naming surfaces.
+    '''
+    import random
+    import frame
+    rng = random.Random(seed)
+    people = sorted({f"{rng.choice(CLUSTER_FIRSTS)} {rng.choice(CLUSTER_LASTS)}" for _ in range(400)})
+    rng.shuffle(people)
+    people = people[:120]
+    roles = ["winner", "winner", "nominee", "nominee", "presenter", "host"]
+    truth = {}
+
+    def surface(person):
+        first, last = person.split(" ", 1)
+        r = rng.random()
+        if r < 0.35:
+            s = person
+        elif r < 0.45:
+            s = person.lower()
+        elif r < 0.55:
+            s = f"{person} {rng.choice(['WINS', 'Wins', 'wins'])}"
+        elif r < 0.6:
+            s = f"RT {person}"
+        elif r < 0.67:
+            s = "#" + person.replace(" ", "")
+        elif r < 0.72:
+            s = "@" + person.replace(" ", "").lower()
+        elif r < 0.8:
+            return last  # ambiguous: not in truth
+        elif r < 0.86:
+            return f"{first[0]}. {last}"
+        else:
+            i = rng.randrange(1, len(person) - 1)
+            s = person[:i] + person[i + 1:] if rng.random() < 0.5 else person[:i] + person[i + 1] + person[i] + person[i + 2:]
+        truth[s] = person
+        return s
+
+    tickets = []
+    for i in range(n):
+        names = []
+        for _ in range(rng.choice([1, 1, 2, 3])):
+            if rng.random() < 0.08:
+                noise = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randrange(4, 9)))
+                name = rng.choice([noise.capitalize(), f"{noise.capitalize()} Golden", f"P3rla {noise}"])
+            else:
+                name = surface(people[int(rng.paretovariate(0.9)) % len(people)])
+            hint = rng.choice(frame.AWARD_NAMES) if rng.random() < 0.6 else None
+            names.append((name, rng.choice(roles), hint))
+        tickets.append({"names-cat": names, "confidence": rng.randrange(1, 5),
+                        "id": 290000000000000000 + i, "user": f"user{int(rng.paretovariate(0.8)) % 5000}"})
+    return tickets, truth
+
+
+def _clusters_summary(clustered):
+    '''{role: sorted (canonical, aliases, evidence multiset)} for comparing clusterings.'''
+    return {role: sorted((cl.canonical, tuple(sorted(cl.aliases)),
+                          tuple(sorted(repr((ev.text, ev.confidence, ev.award_hint, ev.tweet_id, ev.user, n))
+                                       for ev, n in cl.evidence.items()))) for cl in cls)
+            for role, cls in clustered.items()}
+
+
+def _mixed_clusters(clustered, truth):
+    '''Clusters holding surfaces of more than one person (bare last names and initials are not counted).'''
+    return [(role, cl.canonical, sorted({truth[a] for a in cl.aliases if a in truth}))
+            for role, cls in clustered.items() for cl in cls
+            if len({truth[a] for a in cl.aliases if a in truth}) > 1]
+
+
+# "<First> <Last> WINS" / "RT <First> <Last>" surfaces of different people
+# sharing a first name: noise must never link them (cluster._strong_keys)
+SHARD_NOISE_FIXTURE = [
+    {"names-cat": [("Christoph Waltz WINS", "winner", None), ("Christoph Jones WINS", "winner", None)], "confidence": 2},
+    {"names-cat": [("Anne Hathaway WINS", "winner", None), ("Anne Boleyn Wins", "winner", None)], "confidence": 2},
+    {"names-cat": [("RT Tina Fey", "host", None), ("RT Tina Turner", "host", None)], "confidence": 1},
+    {"names-cat": [("christoph waltz", "winner", None), ("Christoph Waltz", "nominee", None)], "confidence": 2},
+]
+SHARD_TICKETS = 3000
+
+
+def bench_shards():
+    '''cluster.cluster_shards: the same clusters however tickets are sharded and merged, and no merges through noise words.'''
+    import random
+    import cluster
+    ok = True
+    fixture = cluster.cluster_shards([SHARD_NOISE_FIXTURE[:2], SHARD_NOISE_FIXTURE[2:]])
+    for role, cls in fixture.items():
+        for cl in cls:
+            people = {" ".join(cluster._features(a).toks) for a in cl.aliases}
+            if len(people) > 1:
+                print(f"noise fixture: {role} cluster {cl.canonical!r} holds {sorted(cl.aliases)}")
+                ok = False
+
+    tickets, truth = _cluster_tickets(SHARD_TICKETS)
+    t0 = time.perf_counter()
+    expected = cluster.cluster_shards([tickets])
+    elapsed = time.perf_counter() - t0
+    rng = random.Random(1)
+    same = 0
+    for n_shards in (5, 9):
+        shuffled = list(tickets)
+        rng.shuffle(shuffled)
+        shards = [cluster.ClusterState.from_tickets(shuffled[i::n_shards]) for i in range(n_shards)]
+        rng.shuffle(shards)
+        state = shards[0]
+        for other in shards[1:]:
+            state.merge(other)
+        same += _clusters_summary(state.finalize()) == _clusters_summary(expected)
+    mixed = _mixed_clusters(expected, truth)
+    for role, canonical, people in mixed[:5]:
+        print(f"  {role} {canonical!r} mixes {people}")
+    print(f"{len(tickets)} tickets: one shard {elapsed:.2f} s, {sum(map(len, expected.values()))} clusters; "
+          f"shuffled into 5 and 9 shards: {same}/2 identical; {len(mixed)} clusters mixing people; "
+          f"noise fixture {'ok' if ok else 'MERGED'}")
+    return ok and same == 2 and not mixed
+
+
+# people sharing "Day Lewis" and first initials, where the person rule (last name + initial) decides
+NGRAM_FIXTURE = ["Daniel Day Lewis", "Kerry Washington", "Kevin Day Lewis", "D. Day Lewis", "Kerry Day Lewis",
+                 "Day Lewis", "Kevin Day-Lewis", "Kerry Washington Wins", "K. Washington"]
+
+
+def bench_ngram():
+    '''cluster_candidates(scorer="ngram") against the full scan, and NgramIndex batches against per-surface scoring.'''
+    import numpy as np
+    import cluster
+    ok = True
+    # one candidates() pass over a batch scores exactly what score() gives surface by surface
+    tickets, _ = _cluster_tickets(SHARD_TICKETS)
+    surfaces = sorted({name for t in tickets for name, _, _ in t["names-cat"]})
+    index = cluster.NgramIndex()
+    for s in surfaces[::2]:
+        index.add(s)
+    queries = surfaces[1::2]
+    t0 = time.perf_counter()
+    q, rows, scores = index.candidates(queries)
+    batch = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    loop = [index.score(s, np.arange(len(index)), shared_token=True) for s in queries]
+    loop_s = time.perf_counter() - t0
+    bounds = q.searchsorted(np.arange(len(queries) + 1))
+    same = all(np.array_equal(np.flatnonzero(shared), rows[bounds[i]:bounds[i + 1]])
+               and np.allclose(s[shared], scores[bounds[i]:bounds[i + 1]])
+               for i, (s, shared) in enumerate(loop))
+    # every pair name_similarity accepts at sim_threshold is in its surface's top NGRAM_TOP_K
+    top = index.top_k(queries, cluster.NGRAM_TOP_K)
+    accepted = kept = 0
+    for i, s in enumerate(queries):
+        for r in rows[bounds[i]:bounds[i + 1]]:
+            if cluster.name_similarity(s, index.keys[r]) >= 0.88:
+                accepted += 1
+                kept += any(key == index.keys[r] for key, _ in top[i])
+    print(f"{len(queries)} surfaces against {len(index)} keys: one batch {batch * 1000:.0f} ms, "
+          f"score() per surface {loop_s * 1000:.0f} ms, {'same' if same else 'DIFFERENT'} scores; "
+          f"{kept}/{accepted} pairs at name_similarity >= 0.88 in the top {cluster.NGRAM_TOP_K}")
+    ok = ok and same and kept == accepted
+
+    fixture = [{"names-cat": [(n, "winner", None)], "confidence": 1} for n in NGRAM_FIXTURE]
+    runs = [(f"{len(NGRAM_FIXTURE)}-name Day Lewis fixture", fixture)]
+    runs += [(f"{BLOCKING_TICKETS} tickets, seed {seed}", _cluster_tickets(BLOCKING_TICKETS, seed=seed)[0])
+             for seed in (0, 1, 2)]
+    for name, tickets in runs:
+        # the reference is the full scan, which neither blocking nor the n-gram shortlist may change
+        t0 = time.perf_counter()
+        full = cluster.cluster_candidates(tickets, blocking=False)
+        t1 = time.perf_counter()
+        ngram = cluster.cluster_candidates(tickets, scorer="ngram")
+        t2 = time.perf_counter()
+        a, b = _clusters_summary(full), _clusters_summary(ngram)
+        changed = sum(len(set(map(repr, a[r])) ^ set(map(repr, b[r]))) for r in a)
+        print(f"{name}: full scan {t1 - t0:.2f} s, ngram {t2 - t1:.2f} s, "
+              f"{changed} cluster entries differ")
+        ok = ok and not changed
+    return ok
+
+
+SNAPSHOT_CEREMONIES = 8
+
+
+def bench_snapshot():
+    '''cluster_candidates with an alias snapshot: a warm rerun gives the cold clusters, old entries are pruned, and seeds mix no more people than a cold run.'''
+    import os
+    import tempfile
+    import cluster
+    tickets, truth = _cluster_tickets(SHARD_TICKETS)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "aliases.json")
+        split_min = cluster.SPLIT_MIN_CANDIDATES
+        cluster.SPLIT_MIN_CANDIDATES = 500  # so split_by_award splits every role of SHARD_TICKETS tickets
+        try:
+            for split in (False, True):
+                t0 = time.perf_counter()
+                cold = cluster.cluster_candidates(tickets, split_by_award=split, snapshot=path)
+                t1 = time.perf_counter()
+                warm = cluster.cluster_candidates(tickets, split_by_award=split, snapshot=path)
+                t2 = time.perf_counter()
+                same = _clusters_summary(cold) == _clusters_summary(warm)
+                print(f"{len(tickets)} tickets{', split by award' if split else ''}: cold {t1 - t0:.2f} s, "
+                      f"warm {t2 - t1:.2f} s, warm clusters {'identical' if same else 'DIFFERENT'}")
+                ok = ok and same
+                os.remove(path)
+        finally:
+            cluster.SPLIT_MIN_CANDIDATES = split_min
+
+        # a run per ceremony, each with its own people; entries of earlier ceremonies age out,
+        # and seeds from earlier ceremonies must not mix up people the cold run keeps apart
+        sizes, mixed = [], []
+        for run in range(1, SNAPSHOT_CEREMONIES + 1):
+            tickets, truth = _cluster_tickets(SHARD_TICKETS // 2, seed=run)
+            warm = cluster.cluster_candidates(tickets, snapshot=path)
+            saved = cluster.load_alias_snapshot(path)
+            seen = [e["last_seen"] for entries in saved.values() for e in entries]
+            sizes.append(len(seen))
+            ok = ok and max(seen) == run and run - min(seen) < cluster.SNAPSHOT_KEEP_RUNS
+            mixed.append((len(_mixed_clusters(warm, truth)),
+                          len(_mixed_clusters(cluster.cluster_candidates(tickets), truth))))
+        print(f"{SNAPSHOT_CEREMONIES} ceremonies of {SHARD_TICKETS // 2} tickets: snapshot entries after each "
+              f"{sizes} (kept {cluster.SNAPSHOT_KEEP_RUNS} runs), {os.path.getsize(path) / 1024:.0f} KiB; "
+              f"clusters mixing people warm/cold {' '.join(f'{w}/{c}' for w, c in mixed)}")
+        ok = ok and all(w <= c for w, c in mixed)
+    return ok
+
+
+EVIDENCE_MENTIONS = 100_000
+EVIDENCE_MEMORY_RATIO = 0.5  # EvidenceStore against a list of Evidence, at most
+
+
+def bench_evidence():
+    '''cluster.EvidenceStore against a list of Evidence: same mentions back, in at most half the memory.'''
+    import random
+    import tracemalloc
+    import cluster
+    import frame
+    rng = random.Random(0)
+    surfaces = ["Anne Hathaway", "anne hathaway", "Hathaway", "Anne Hathaway WINS", "#AnneHathaway"]
+    hints = [None] + list(frame.AWARD_NAMES[:6])
+    ok = True
+    for users in ("repeat", "unique"):
+        evidence = [cluster.Evidence(rng.choice(surfaces), rng.randrange(1, 5), rng.choice(hints),
+                                     290000000000000000 + i,
+                                     f"user{i}" if users == "unique" else f"user{int(rng.paretovariate(0.8)) % 5000}")
+                    for i in range(EVIDENCE_MENTIONS)]
+        memory = {}
+        for name, build in (("list", lambda: [cluster.Evidence(ev.text, ev.confidence, ev.award_hint, ev.tweet_id, ev.user)
+                                               for ev in evidence]),
+                            ("store", lambda: cluster.EvidenceStore(evidence))):
+            tracemalloc.start()
+            built = build()
+            memory[name] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        store = built
+        t0 = time.perf_counter()
+        hits = cluster.Cluster("winner", "Anne Hathaway", evidence=store).hits()
+        elapsed = time.perf_counter() - t0
+        same = (list(store) == evidence and store.total == sum(ev.confidence for ev in evidence)
+                and [h["tweet_id"] for h in hits] == [ev.tweet_id for ev in evidence])
+        print(f"{EVIDENCE_MENTIONS} mentions with tweet ids, {users} users: list {memory['list'] / 2 ** 20:.1f} MiB, "
+              f"store {memory['store'] / 2 ** 20:.1f} MiB; hits() {elapsed * 1e3:.0f} ms; "
+              f"{'same' if same else 'DIFFERENT'} mentions back")
+        ok = ok and same and memory["store"] <= EVIDENCE_MEMORY_RATIO * memory["list"]
+    return ok
+
+
+BLOCKING_TICKETS = 1500
+
+
+def bench_blocking():
+    '''cluster_candidates with blocking against the full scan (blocking=False): the same clusters, faster.'''
+    import cluster
+    ok = True
+    for seed in (0, 1, 2):
+        tickets, _ = _cluster_tickets(BLOCKING_TICKETS, seed=seed)
+        t0 = time.perf_counter()
+        full = _clusters_summary(cluster.cluster_candidates(tickets, blocking=False))
+        t1 = time.perf_counter()
+        blocked = _clusters_summary(cluster.cluster_candidates(tickets))
+        t2 = time.perf_counter()
+        changed = sum(len(set(map(repr, full[r])) ^ set(map(repr, blocked[r]))) for r in full)
+        print(f"{BLOCKING_TICKETS} tickets, seed {seed}: full scan {t1 - t0:.2f} s, blocking {t2 - t1:.2f} s "
+              f"({(t1 - t0) / (t2 - t1):.1f}x), {changed} cluster entries differ")
+        ok = ok and not changed
+    return ok
+
+
+AGGREGATE_BUDGET_MS = 100  # score_awards on AGGREGATE_HITS hits
+
+
+def _score_awards_loop(hits_by_award, cfg, alias_counts=None):
+    '''score_awards written as a loop over the per-hit helpers, kept as the reference.'''
+    import aggregation as agg
+    out = {}
+    for award, by_cand in hits_by_award.items():
+        rows = []
+        for cand, hits in by_cand.items():
+            hits = [dict(h, _i=i) for i, h in enumerate(hits)
+                    if not (cfg.HEDGED_ZERO_OUT and h.get("hedged"))]
+            kept = sorted(agg._apply_user_cap(hits, cfg.USER_CAP), key=lambda h: h["_i"])
+            seen = set()
+            total = 0.0
+            for h in kept:
+                s = agg._score_hit(h, cfg)
+                th = h.get("text_hash")
+                if th:
+                    if th in seen:
+                        s *= cfg.RT_DUP_PENALTY
+                    seen.add(th)
+                total += s
+            total += cfg.STRICT_HIT_BONUS * sum(1 for h in kept if h.get("weight", 1) >= 3)
+            total += cfg.DISTINCT_USER_BONUS * len({h.get("user", "?") for h in kept})
+            total += cfg.ALIAS_BONUS * (alias_counts or {}).get(cand, 0)
+            rows.append((cand, total))
+        confs = agg._softmax([t for _, t in rows], cfg.CONF_TEMPERATURE)
+        ranked = sorted(((c, t, p) for (c, t), p in zip(rows, confs)), key=lambda r: -r[1])
+        out[award] = ranked
+    return out
+
+
+def _ceremony_hits(n, seed=0):
+    '''Synthetic evidence: 31 awards, skewed candidates, a few heavy users, echoed texts.'''
+    import random
+    rng = random.Random(seed)
+    by_award = {}
+    for _ in range(n):
+        award = f"award {rng.randrange(31)}"
+        cand = f"candidate {int(rng.paretovariate(1.2)) % 60}"
+        user = f"user{int(rng.paretovariate(0.8)) % 20000}"
+        by_award.setdefault(award, {}).setdefault(cand, []).append({
+            "kind": rng.choice(["WIN", "WIN", "NOM", "MENTION"]), "weight": rng.choice([1, 1, 2, 3]),
+            "clean_bonus": rng.choice([0.9, 1.0, 1.0, 1.1]), "hedged": rng.random() < 0.05,
+            "user": user, "text_hash": f"{rng.randrange(n // 3):x}"})
+    return by_award
+
+
+AGGREGATE_HITS = 100_000
+
+
+def bench_aggregate():
+    '''aggregation.score_awards on a synthetic ceremony against the per-hit helper loop.'''
+    import math
+    import aggregation as agg
+    cfg = agg.AggregationConfig
+    by_award = _ceremony_hits(AGGREGATE_HITS)
+    cols = agg.hits_to_columns(by_award)
+
+    agg.score_awards(agg.hits_to_columns({"a": {"b": [{}]}}), cfg)  # warm up the NumPy import
+    t0 = time.perf_counter()
+    expected = _score_awards_loop(by_award, cfg)
+    loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = agg.score_awards(cols, cfg)
+    vec = time.perf_counter() - t0
+
+    # same scores and confidences (up to float summation order), ranked best first
+    for award, rows in expected.items():
+        mine = {c: (t, p) for c, t, p in got[award]}
+        totals = [t for _, t, _ in got[award]]
+        if len(mine) != len(rows) or totals != sorted(totals, reverse=True) or not all(
+                math.isclose(mine[c][0], t) and math.isclose(mine[c][1], p, rel_tol=1e-6, abs_tol=1e-12)
+                for c, t, p in rows):
+            raise AssertionError(f"score_awards disagrees with the reference loop on {award}")
+    print(f"{AGGREGATE_HITS} hits, {len(by_award)} awards: loop {loop * 1000:.0f} ms, "
+          f"score_awards {vec * 1000:.0f} ms ({loop / vec:.1f}x, budget {AGGREGATE_BUDGET_MS} ms)")
+    return vec * 1000 <= AGGREGATE_BUDGET_MS
+
+
+ECHO_TEXTS = 100_000
+ECHO_MIN_RATE = 25_000  # texts/s through aggregation.echo_groups
+
+
+def _echo_variants(n, seed=0):
+    '''Echoes of the sample tweets as a ceremony has them: (texts, index of the original each copies).'''
+    import random
+    import aggregation as agg
+    rng = random.Random(seed)
+    bases, seen = [], set()
+    for t in _sample_texts():
+        norm = agg._echo_norm(t)
+        if len(norm.split()) >= 4 and norm not in seen:
+            seen.add(norm)
+            bases.append(t)
+    comments = ["So true", "THIS", "lol", "yes!!", "Agreed.", "omg"]
+    tags = ["#GoldenGlobes", "#redcarpet", "#GG2013", "#goldenglobes #RedCarpet"]
+    texts, source = [], []
+    for _ in range(n):
+        b = rng.randrange(len(bases))
+        text = bases[b]
+        if rng.random() < 0.5:
+            text = f"RT @user{rng.randrange(10_000)}: {text}"
+        if rng.random() < 0.3:
+            text = f"{rng.choice(comments)} {text}"
+        if rng.random() < 0.4:
+            text = f"{text} http://t.co/{rng.randrange(16 ** 8):08x}"
+        if rng.random() < 0.3:
+            text = f"{text} {rng.choice(tags)}"
+        if rng.random() < 0.3:
+            text = f"{text} {rng.choice(comments)}"
+        if rng.random() < 0.3:  # a typo
+            i = rng.randrange(len(text))
+            text = text[:i] + text[i + 1:]
+        texts.append(text if rng.random() < 0.8 else text.lower())
+        source.append(b)
+    return texts, source
+
+
+def bench_echo():
+    '''aggregation.echo_groups throughput, and how well it regroups known echoes of the sample tweets.'''
+    from collections import Counter
+    import aggregation as agg
+    cfg = agg.AggregationConfig
+    texts, source = _echo_variants(ECHO_TEXTS)
+    agg.echo_groups(texts[:10])  # warm up the NumPy import
+
+    t0 = time.perf_counter()
+    group, _ = agg.echo_groups(texts, cfg.ECHO_THRESHOLD, cfg.ECHO_NUM_PERM)
+    elapsed = time.perf_counter() - t0
+
+    # recall: echoes landing in their original's biggest group; purity: groups holding one original
+    by_source = {}
+    for s, g in zip(source, group.tolist()):
+        by_source.setdefault(s, Counter())[g] += 1
+    recall = sum(c.most_common(1)[0][1] for c in by_source.values()) / len(texts)
+    sources_per_group = Counter(g for g in {(g, s) for s, g in zip(source, group.tolist())})
+    mixed = sum(1 for g, k in sources_per_group.items() if k > 1)
+    exact = len(agg._dedupe_like_rts([{"text": t} for t in texts]))
+    rate = len(texts) / elapsed
+    print(f"{len(texts)} texts from {len(by_source)} originals: {elapsed * 1000:.0f} ms ({rate:.0f} texts/s, "
+          f"min {ECHO_MIN_RATE}), {len(sources_per_group)} echo groups vs {exact} exact-text groups, "
+          f"recall {recall:.3f}, {mixed} groups mixing originals "
+          f"(threshold {cfg.ECHO_THRESHOLD}, {cfg.ECHO_NUM_PERM} permutations)")
+    return rate >= ECHO_MIN_RATE
+
+
+STREAM_TOP_K = 5
+STREAM_TIE_TOLERANCE = 0.05  # exact scores this close may swap ranks
+
+
+def _firehose_hits(n, seed=0, continuous=False):
+    '''
+    _ceremony_hits with a long tail: a third of the hits name one-off noise
+    candidates. continuous: every clean_bonus is a distinct float in 0.85..1.25.
+    '''
+    import random
+    rng = random.Random(seed)
+    by_award = _ceremony_hits(n, seed)
+    for by_cand in by_award.values():
+        for cand in list(by_cand):
+            hits = by_cand[cand]
+            for i in range(len(hits) // 2):
+                by_cand.setdefault(f"noise {rng.randrange(10 ** 9)}", []).append(dict(hits[i], kind="MENTION"))
+            if continuous:
+                for h in hits:
+                    h["clean_bonus"] = rng.uniform(0.85, 1.25)
+    return by_award
+
+
+def bench_stream():
+    '''StreamingAggregator against score_awards: the same top-k, in memory that does not grow with the stream.'''
+    import tracemalloc
+    import aggregation as agg
+    ok = True
+    for n, continuous in ((AGGREGATE_HITS // 4, False), (AGGREGATE_HITS, False), (AGGREGATE_HITS, True)):
+        by_award = _firehose_hits(n, continuous=continuous)
+        hits = sum(len(h) for c in by_award.values() for h in c.values())
+        expected = agg.score_awards(agg.hits_to_columns(by_award))
+
+        t0 = time.perf_counter()
+        stream = agg.StreamingAggregator()
+        stream.update(by_award)
+        got = stream.result()
+        elapsed = time.perf_counter() - t0
+        tracemalloc.start()
+        agg.StreamingAggregator().update(by_award)
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # rank by rank, the streamed candidate's exact score matches the exact ranking's
+        agree = 0
+        for award, rows in expected.items():
+            exact = {c: t for c, t, _ in rows}
+            mine = [exact.get(c, 0.0) for c, _, _ in got[award][:STREAM_TOP_K]]
+            agree += all(abs(m - t) <= STREAM_TIE_TOLERANCE * t for m, (_, t, _) in zip(mine, rows))
+        names = len({c for by_cand in by_award.values() for c in by_cand})
+        print(f"{hits} hits, {names} distinct candidates{', continuous clean_bonus' if continuous else ''}: "
+              f"{hits / elapsed:.0f} hits/s, peak {memory / 2 ** 20:.1f} MiB, {len(stream._levels)} cap levels, "
+              f"top-{STREAM_TOP_K} agrees on {agree}/{len(expected)} awards "
+              f"(scores within {STREAM_TIE_TOLERANCE:.0%} may swap)")
+        ok = ok and agree == len(expected)
+    return ok
+
+
+CALL_LATENCY_BUDGET_S = 30  # median seconds from announcement to the winner being called
+
+
+def _broadcast(n_awards=25, seed=0):
+    '''
+    A synthetic broadcast: an award announced every 4 minutes, hedged and
+    unhedged predictions and nominee chatter all night, and after each
+    announcement a burst of WIN hits for the winner that fades over a few
+    minutes. Returns (hits by award, {award: (winner, announced at ms)}).
+    '''
+    import random
+    rng = random.Random(seed)
+    start = 1358121600000  # 00:00 UTC on the night
+    end = start + (n_awards + 2) * 240_000
+    by_award, answers = {}, {}
+    for a in range(n_awards):
+        award = f"award {a}"
+        nominees = [f"nominee {a}.{i}" for i in range(5)]
+        winner = rng.choice(nominees)
+        at = start + (a + 1) * 240_000 + rng.randrange(60_000)
+        answers[award] = (winner, at)
+        hits = by_award.setdefault(award, {})
+
+        def hit(cand, ts, kind, hedged=False):
+            user = f"user{rng.randrange(50_000)}"
+            hits.setdefault(cand, []).append({
+                "kind": kind, "weight": rng.choice([1, 1, 2, 3]), "hedged": hedged, "user": user,
+                "ts": ts, "text": f"{cand} {kind} {rng.randrange(1000)}"})
+
+        ts = start
+        while ts < end:  # chatter and predictions, ~1 hit / 10 s per award
+            ts += int(rng.expovariate(1 / 10_000))
+            kind = rng.choice(["NOM", "MENTION", "WIN"])
+            hit(rng.choice(nominees), ts, kind, hedged=kind == "WIN" and rng.random() < 0.7)
+        for _ in range(300):  # the announcement burst
+            ts = at + int(rng.expovariate(1 / 60_000))
+            hit(winner if rng.random() < 0.85 else rng.choice(nominees), ts, rng.choice(["WIN", "WIN", "MENTION"]))
+    return by_award, answers
+
+
+def bench_calls():
+    '''OnlineAggregator replaying a synthetic broadcast: right calls, seconds after each announcement.'''
+    import aggregation as agg
+    by_award, answers = _broadcast()
+    stream = list(agg.iter_hits_by_time(by_award))
+
+    t0 = time.perf_counter()
+    online = agg.OnlineAggregator()
+    events = list(online.run(stream))
+    elapsed = time.perf_counter() - t0
+
+    first = {}
+    for e in events:
+        first.setdefault(e["award"], e)
+    early = sum(1 for e in events if e["ts"] < answers[e["award"]][1])
+    right = sum(1 for award, (winner, _) in answers.items()
+                if award in online.calls and online.calls[award]["winner"] == winner)
+    latency = sorted((first[a]["ts"] - at) / 1000 for a, (_, at) in answers.items() if a in first)
+    median = latency[len(latency) // 2] if latency else float("inf")
+
+    # the user cap as in _apply_user_cap: without decay or texts, and with 40 users posting
+    # everything, a candidate's score is the sum of _score_hit over the hits iter_user_cap keeps
+    class Flat(agg.AggregationConfig):
+        DECAY_HALF_LIFE_S = float("inf")
+    spam = [(award, cand, dict(h, user=f"user{i % 40}", text=None)) for i, (award, cand, h) in enumerate(stream)]
+    flat = agg.OnlineAggregator(Flat)
+    kept = {}
+    for award, cand, h in spam:
+        flat.add(award, cand, h)
+        if not h["hedged"]:
+            kept.setdefault((award, cand), []).append(h)
+    capped = max(abs(flat.scores(award)[cand] - sum(agg._score_hit(h, Flat) for h in agg.iter_user_cap(hits, Flat.USER_CAP)))
+                 for (award, cand), hits in kept.items())
+
+    print(f"{len(stream)} hits over {len(answers)} awards: {len(stream) / elapsed:.0f} hits/s, "
+          f"{len(events)} calls ({early} before the announcement), {right}/{len(answers)} final calls right, "
+          f"latency median {median:.1f} s, max {latency[-1] if latency else float('inf'):.1f} s "
+          f"(budget {CALL_LATENCY_BUDGET_S} s median); user cap against iter_user_cap off by at most {capped:.1e}")
+    return right == len(answers) and early == 0 and median <= CALL_LATENCY_BUDGET_S and capped < 1e-6
+
+
+TIMEINDEX_TWEETS = 500_000
+TIMEINDEX_SPEEDUP_TARGET = 100.0  # window queries against a scan of the records
+
+
+def _night_of_tweets(n, seed=0):
+    '''n sample tweets spread over a 4-hour night, in corpus (not time) order.'''
+    import random
+    rng = random.Random(seed)
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    start = 1358121600000
+    return [dict(rng.choice(sample), id=290000000000000000 + i, timestamp_ms=start + rng.randrange(4 * 3_600_000))
+            for i in range(n)]
+
+
+def bench_timeindex(queries=200):
+    '''timeindex.TweetIndex build, save/load, 5-minute window queries and the per-minute histogram.'''
+    import os
+    import random
+    import tempfile
+    from collections import Counter
+    import timeindex
+    tweets = _night_of_tweets(TIMEINDEX_TWEETS)
+    rng = random.Random(1)
+    start = min(t["timestamp_ms"] for t in tweets)
+    windows = [(s, s + 5 * timeindex.MINUTE_MS)
+               for s in (start + rng.randrange(4 * 3_600_000) for _ in range(queries))]
+
+    t0 = time.perf_counter()
+    index = timeindex.TweetIndex.build(tweets)
+    build = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.npz")
+        index.save(path)
+        t0 = time.perf_counter()
+        index = timeindex.TweetIndex.load(path)
+        load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    expected = [[t for t in tweets if lo <= t["timestamp_ms"] < hi] for lo, hi in windows[:10]]
+    scan = (time.perf_counter() - t0) / 10
+    t0 = time.perf_counter()
+    counts = [index.count(lo, hi) for lo, hi in windows]
+    query = (time.perf_counter() - t0) / queries
+    t0 = time.perf_counter()
+    got = [list(index.window(lo, hi)) for lo, hi in windows[:10]]
+    materialize = (time.perf_counter() - t0) / 10
+
+    key = lambda t: (t["timestamp_ms"], t["id"])
+    if [sorted(map(key, w)) for w in expected] != [sorted(map(key, w)) for w in got] or \
+            [len(w) for w in expected] != counts[:10]:
+        raise AssertionError("TweetIndex windows disagree with a scan of the records")
+    if any(g["text"] != e["text"] for w_e, w_g in zip(expected, got)
+           for e, g in zip(sorted(w_e, key=key), sorted(w_g, key=key))):
+        raise AssertionError("TweetIndex returns the wrong texts")
+    t0 = time.perf_counter()
+    bins, per_minute = index.histogram()
+    histogram = time.perf_counter() - t0
+    if dict(zip(bins.tolist(), per_minute.tolist())) != {
+            **{b: 0 for b in bins.tolist()},
+            **Counter(t["timestamp_ms"] // timeindex.MINUTE_MS * timeindex.MINUTE_MS for t in tweets)}:
+        raise AssertionError("TweetIndex histogram disagrees with counting the records")
+
+    print(f"{len(index)} tweets: build {build:.2f} s, load {load * 1000:.0f} ms, "
+          f"5-minute window: scan {scan * 1000:.1f} ms, index {query * 1e6:.1f} us ({scan / query:.0f}x), "
+          f"{materialize * 1000:.1f} ms to read its ~{sum(counts) // queries} records, "
+          f"{len(bins)}-minute histogram {histogram * 1000:.1f} ms (target {TIMEINDEX_SPEEDUP_TARGET:.0f}x)")
+    return scan / query >= TIMEINDEX_SPEEDUP_TARGET
+
+
+BURST_TWEETS = 300_000
+
+
+def _ceremony_tweets(n, seed=0):
+    '''
+    n tweets over a 3.5-hour night: sample tweets, award talk ("hoping X wins
+    Best ...") all night, and after each award's announcement a burst of
+    "... wins Best ..." tweets. Returns (records, {award: announced at ms}).
+    '''
+    import random
+    import frame
+    rng = random.Random(seed)
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        sample = [t["text"] for t in json.load(f)]
+    start, length = 1358121600000, int(3.5 * 3_600_000)
+    awards = [a for a in frame.AWARD_NAMES if a.startswith("Best")]
+    announced = {a: start + 900_000 + i * (length - 1_800_000) // len(awards) for i, a in enumerate(awards)}
+    records = []
+    for i in range(n):
+        r = rng.random()
+        award = rng.choice(awards)
+        if r < 0.9:
+            text, ts = rng.choice(sample), start + rng.randrange(length)
+        elif r < 0.95:
+            text, ts = f"hoping Jane Doe gets {award} tonight", start + rng.randrange(length)
+        else:
+            text = f"Jane Doe wins {award}! #GoldenGlobes"
+            ts = announced[award] + int(rng.expovariate(1 / 120_000))
+        records.append({"text": text, "id": 290000000000000000 + i, "user": f"user{rng.randrange(50_000)}",
+                        "timestamp_ms": ts})
+    return records, announced
+
+
+def bench_burst():
+    '''burst.detect_bursts over a synthetic night: one window per award around its announcement.'''
+    import burst
+    import timeindex
+    records, announced = _ceremony_tweets(BURST_TWEETS)
+    index = timeindex.TweetIndex.build(records)
+
+    t0 = time.perf_counter()
+    timeline = burst.detect_bursts(index)
+    elapsed = time.perf_counter() - t0
+
+    found = burst.windows(timeline)
+    covered = sum(1 for a, at in announced.items() if a in found and found[a][0] <= at < found[a][1])
+    union = len(burst.tweets_in_windows(index, found))
+    own = sum(index.count(start, end) for start, end in found.values()) / max(len(found), 1)
+    minutes = sorted((end - start) // timeindex.MINUTE_MS for start, end in found.values())
+    # scoped_tickets' input: the windows' tweets, plus every host mention outside them, in time order
+    scoped = list(burst.scoped_records(index, found))
+    inside = {r["id"] for r in burst.tweets_in_windows(index, found)}
+    hosts = {index.record(i)["id"] for i in range(len(index))
+             if "present" in index.texts[i].lower() or "host" in index.texts[i].lower()} - inside
+    ts = [r["timestamp_ms"] for r in scoped]
+    kept = ts == sorted(ts) and {r["id"] for r in scoped} >= inside | hosts
+    print(f"{len(index)} tweets: timeline in {elapsed:.2f} s, {len(found)} windows, "
+          f"{covered}/{len(announced)} announcements inside theirs, median window {minutes[len(minutes) // 2]} min; "
+          f"an award sees {own / len(index):.1%} of the tweets, all windows together {union / len(index):.0%}; "
+          f"scoped tickets read {len(scoped) / len(index):.0%} with {len(hosts)} host mentions outside the windows "
+          f"{'kept' if kept else 'LOST'}")
+    return covered == len(announced) and kept
+
+
+BENCHMARKS = {
+    "import": bench_import,
+    "ner": bench_ner,
+    "prefilter": bench_prefilter,
+    "award": bench_award,
+    "cache": bench_cache,
+    "matcher": bench_matcher,
+    "resume": bench_resume,
+    "shards": bench_shards,
+    "blocking": bench_blocking,
+    "snapshot": bench_snapshot,
+    "ngram": bench_ngram,
+    "evidence": bench_evidence,
+    "aggregate": bench_aggregate,
+    "echo": bench_echo,
+    "stream": bench_stream,
+    "calls": bench_calls,
+    "timeindex": bench_timeindex,
+    "burst": bench_burst,
+}
+
+
+def main(names):
+    ok = True
+    for name in names:
+        t0 = time.perf_counter()
+        passed = BENCHMARKS[name]()
+        status = "ok" if passed else "OVER BUDGET"
+        print(f"[{name}] {status} ({time.perf_counter() - t0:.1f}s)\n")
+        ok = ok and passed
+    return ok
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    sys.exit(0 if main(names) else 1)
@@ -0,0 +1,226 @@
+# burst.py
+# When was each award announced? Per-minute counts of "Best ..." phrases
+# resolved with frame.find_best_award, a burst detector over each award's
+# series, and the helpers that scope ticket extraction to those windows.
+#
+#   python burst.py [tweets.json] [timeline.json]
+import json
+import os
+import sys
+
+from frame import AWARD_NAMES, BEST_PHRASE_RE, BEST_START_RE, Prefilter, find_best_award, prewarm_award_cache, get_tickets
+from timeindex import MINUTE_MS, TweetIndex
+
+TIMELINE_PATH = "timeline.json"
+TIMELINE_VERSION = 1
+
+# burst detection (per award, over its per-minute match counts)
+SMOOTH_MINUTES = 3     # centered moving sum before anything else
+BURST_Z = 4.0          # peak must clear median + BURST_Z * robust sd of the series...
+BURST_MIN_COUNT = 5    # ...and hold at least this many matches (smoothed)
+BURST_FALLOFF = 0.2    # the window extends while above this fraction of the peak's excess
+PAD_BEFORE_MINUTES = 2   # kept before the burst (build-up, the nominee read-out)
+PAD_AFTER_MINUTES = 5    # kept after it (late reactions, the acceptance speech)
+# outside every window a tweet only matters for its host entries (presenter, no award:
+# frame.PRESENTER_TERMS), and for awards without a window its "Best ..." phrases too
+UNSCOPED_TERMS = ("present", "host")
+
+
+def award_minute_counts(index, awards=AWARD_NAMES):
+    """
+    (minute starts, counts) for a TweetIndex: counts is an awards x minutes
+    int64 array of how many tweets that minute had a "Best ..." phrase
+    resolving (find_best_award) to each award; a tweet counts once per award.
+    """
+    import numpy as np
+    minutes, _ = index.histogram(MINUTE_MS)
+    row = {a: i for i, a in enumerate(awards)}
+    found = []  # (tweet position, phrase)
+    for i in range(len(index)):
+        text = index.texts[i]
+        if BEST_START_RE.search(text):
+            found.extend((i, m.group(0)) for m in BEST_PHRASE_RE.finditer(text))
+    prewarm_award_cache(phrase for _, phrase in found)
+    hits = {(i, row[a]) for i, phrase in found for a in (find_best_award(phrase),) if a in row}
+    counts = np.zeros((len(awards), len(minutes)), dtype=np.int64)
+    if hits:
+        pos, award = np.array(sorted(hits), dtype=np.int64).T
+        col = index.ts[pos] // MINUTE_MS - (minutes[0] // MINUTE_MS)
+        np.add.at(counts, (award, col), 1)
+    return minutes, counts
+
+
+def find_burst(counts):
+    """
+    The announcement burst in one award's per-minute counts, as
+    (first minute, last minute, peak minute) positions (padding not
+    included), or None when nothing stands out of the series.
+    """
+    import numpy as np
+    if not len(counts):
+        return None
+    smooth = np.convolve(counts, np.ones(SMOOTH_MINUTES), mode="same")
+    base = float(np.median(smooth))
+    spread = max(1.4826 * float(np.median(np.abs(smooth - base))), 1.0)
+    peak = int(np.argmax(smooth))
+    if smooth[peak] < max(base + BURST_Z * spread, BURST_MIN_COUNT):
+        return None
+    floor = base + BURST_FALLOFF * (smooth[peak] - base)
+    first = last = peak
+    while first > 0 and smooth[first - 1] > floor:
+        first -= 1
+    while last + 1 < len(smooth) and smooth[last + 1] > floor:
+        last += 1
+    return first, last, peak
+
+
+def detect_bursts(index, awards=AWARD_NAMES):
+    """
+    Build the timeline for a TweetIndex: overall per-minute volume, each
+    award's per-minute match counts and its announcement window
+    {"start", "end" (epoch ms, half-open, padded), "peak", "matches"}, or
+    None for awards with no burst (they are not scoped).
+    """
+    minutes, counts = award_minute_counts(index, awards)
+    _, volume = index.histogram(MINUTE_MS)
+    timeline = {"version": TIMELINE_VERSION, "bin_ms": MINUTE_MS,
+                "start": int(minutes[0]) if len(minutes) else None,
+                "volume": volume.tolist(), "awards": {}}
+    for award, series in zip(awards, counts):
+        burst = find_burst(series)
+        window = None
+        if burst is not None:
+            first, last, peak = burst
+            window = {"start": int(minutes[0]) + (first - PAD_BEFORE_MINUTES) * MINUTE_MS,
+                      "end": int(minutes[0]) + (last + 1 + PAD_AFTER_MINUTES) * MINUTE_MS,
+                      "peak": int(minutes[peak]), "matches": int(series[first:last + 1].sum())}
+        timeline["awards"][award] = {"counts": series.tolist(), "window": window}
+    return timeline
+
+
+def windows(timeline):
+    """{award: (start, end)} for the awards the timeline found a burst for."""
+    return {a: (w["window"]["start"], w["window"]["end"])
+            for a, w in timeline["awards"].items() if w["window"] is not None}
+
+
+def tweets_in_windows(index, award_windows):
+    """
+    Re-iterable records of every tweet inside some award's window, in time
+    order, each once however many windows overlap it.
+    """
+    ranges = sorted(index.range(start, end) for start, end in award_windows.values())
+    merged = []
+    for lo, hi in ranges:
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        elif hi > lo:
+            merged.append([lo, hi])
+    return _Ranges(index, merged)
+
+
+class _Ranges:
+    def __init__(self, index, ranges):
+        self.index = index
+        self.ranges = ranges
+
+    def __iter__(self):
+        record = self.index.record
+        return (record(i) for lo, hi in self.ranges for i in range(lo, hi))
+
+    def __len__(self):
+        return sum(hi - lo for lo, hi in self.ranges)
+
+
+def scoped_records(index, award_windows, awards=AWARD_NAMES):
+    """
+    Re-iterable records, in time order, of the tweets scoped_tickets needs:
+    every tweet inside some award's window, and of the rest those that can
+    still give an entry scope_tickets keeps, i.e. that mention a host or
+    presenter (UNSCOPED_TERMS) or, when some award has no window, "best".
+    """
+    terms = UNSCOPED_TERMS
+    if any(a not in award_windows for a in awards):
+        terms += ("best",)
+    return _Scoped(index, tweets_in_windows(index, award_windows).ranges, terms)
+
+
+class _Scoped:
+    def __init__(self, index, ranges, terms):
+        self.index = index
+        self.ranges = ranges
+        self.terms = terms
+
+    def __iter__(self):
+        record, texts = self.index.record, self.index.texts
+        gate = Prefilter(self.terms)
+        pos = 0
+        for lo, hi in self.ranges + [(len(self.index), len(self.index))]:
+            for i in range(pos, lo):
+                if gate(texts[i]):
+                    yield record(i)
+            for i in range(lo, hi):
+                yield record(i)
+            pos = hi
+
+
+def scope_tickets(tickets, award_windows):
+    """
+    Drop the names-cat entries tied to an award whose window does not hold
+    the ticket's "ts"; entries for awards without a window, or without an
+    award (hosts), are kept. Tickets left with no entries are dropped.
+    """
+    out = []
+    for t in tickets:
+        ts = t.get("ts")
+        kept = []
+        for entry in t["names-cat"]:
+            window = award_windows.get(entry[2])
+            if window is None or (ts is not None and window[0] <= ts < window[1]):
+                kept.append(entry)
+        if kept:
+            out.append(dict(t, **{"names-cat": kept}))
+    return out
+
+
+def scoped_tickets(index, timeline, **kwargs):
+    """
+    Tickets scoped to the timeline's award windows (kwargs go to
+    frame.get_tickets): each ticket's award-tied entries are restricted to
+    their own award's window, while host entries and awards without a window
+    come from the whole corpus (see scoped_records).
+    """
+    award_windows = windows(timeline)
+    return scope_tickets(get_tickets(scoped_records(index, award_windows), **kwargs), award_windows)
+
+
+def save_timeline(timeline, path=TIMELINE_PATH):
+    """Atomically write the timeline as JSON."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(timeline, f)
+    os.replace(tmp, path)
+
+
+def load_timeline(path=TIMELINE_PATH):
+    """The saved timeline, or None if there is no (usable) one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            timeline = json.load(f)
+    except FileNotFoundError:
+        return None
+    return timeline if timeline.get("version") == TIMELINE_VERSION else None
+
+
+if __name__ == "__main__":
+    import datetime
+    from extraction import DATA_PATH, TweetStream
+    data = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    out = sys.argv[2] if len(sys.argv) > 2 else TIMELINE_PATH
+    timeline = detect_bursts(TweetIndex.build(TweetStream(data)))
+    save_timeline(timeline, out)
+    for award, entry in timeline["awards"].items():
+        w = entry["window"]
+        peak = datetime.datetime.fromtimestamp(w["peak"] / 1000, datetime.timezone.utc) if w else None
+        span = f"{(w['end'] - w['start']) // MINUTE_MS:3d} min around {peak:%H:%M} UTC" if w else "no burst"
+        print(f"{award}: {span}")
@@ -3,10 +3,16 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional, Iterable
+import json
+import os
 import re
+import sys
 import unicodedata
 from difflib import SequenceMatcher
-from collections import defaultdict
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from itertools import repeat
+from functools import partial
 
 # ---------- Roles we support ----------
 DEFAULT_ROLE_KEYS = {"winner", "nominee", "presenter", "host"}
@@ -19,22 +25,124 @@ NOISE_TOKENS = {
     "presented", "presenting", "host", "hosts", "hosted"
 }
 
+# aggregation.py evidence "kind" for each role
+ROLE_KINDS = {"winner": "WIN", "nominee": "NOM"}
+
 # ---------- Data structures ----------
-@dataclass
+@dataclass(slots=True)
 class Evidence:
     text: Optional[str] = None
     confidence: int = 1
     award_hint: Optional[str] = None
+    tweet_id: Optional[int] = None
+    user: Optional[str] = None
+
+_NO_ID = -1  # EvidenceStore id column value for a mention without a tweet id
+
+def _intern(s):
+    return sys.intern(s) if isinstance(s, str) else s
+
+class EvidenceStore:
+    """
+    A cluster's evidence in columns. What repeats across mentions (text,
+    confidence, award hint) is kept once per distinct entry; per mention
+    there is only the entry number and tweet id, in two arrays, and the
+    user. Award hints are interned, so repeats share one string. The
+    confidence total and mention count are kept up to date as evidence is
+    added. Iterating yields one Evidence per mention, in the order added,
+    as a list would.
+    """
+    __slots__ = ("_entries", "_entry_col", "_user_col", "_id_col", "total", "mentions")
+
+    def __init__(self, evidence: Iterable[Evidence] = ()) -> None:
+        # (text, confidence, award_hint) -> entry number
+        self._entries: Dict[Tuple, int] = {}
+        self._entry_col = array("I")
+        self._user_col: List = []
+        self._id_col = array("q")  # becomes a list once an id is not a 64-bit int
+        self.total = 0
+        self.mentions = 0
+        self.extend(evidence)
+
+    def append(self, ev: Evidence, n: int = 1) -> None:
+        key = (ev.text, ev.confidence, _intern(ev.award_hint))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = len(self._entries)
+        tweet_id = ev.tweet_id
+        if tweet_id is None:
+            tweet_id = _NO_ID
+        elif isinstance(self._id_col, array) and not (isinstance(tweet_id, int) and 0 <= tweet_id < 1 << 63):
+            self._id_col = list(self._id_col)
+        self._entry_col.extend(repeat(entry, n))
+        self._user_col.extend(repeat(ev.user, n))
+        self._id_col.extend(repeat(tweet_id, n))
+        self.total += ev.confidence * n
+        self.mentions += n
+
+    def extend(self, evidence: Iterable[Evidence]) -> None:
+        for ev in evidence:
+            self.append(ev)
+
+    def columns(self) -> Tuple[List[Tuple], Iterable[int], List, Iterable]:
+        """
+        (entries, entry per mention, user per mention, tweet id per mention),
+        where entries are the distinct (text, confidence, award_hint). A
+        missing tweet id is None.
+        """
+        ids = (None if t == _NO_ID else t for t in self._id_col)
+        return list(self._entries), self._entry_col, self._user_col, ids
+
+    def items(self) -> Iterable[Tuple[Evidence, int]]:
+        """(evidence, mentions) per distinct mention, in the order each first appeared."""
+        entries, numbers, users, ids = self.columns()
+        counts: Dict[Tuple, int] = {}
+        for row in zip(numbers, users, ids):
+            counts[row] = counts.get(row, 0) + 1
+        for (number, user, tweet_id), n in counts.items():
+            yield Evidence(*entries[number], tweet_id, user), n
+
+    def __iter__(self):
+        entries, numbers, users, ids = self.columns()
+        for number, user, tweet_id in zip(numbers, users, ids):
+            yield Evidence(*entries[number], tweet_id, user)
+
+    def __len__(self) -> int:
+        return self.mentions
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, EvidenceStore):
+            return Counter(self._rows()) == Counter(other._rows())
+        return NotImplemented
+
+    def _rows(self) -> Iterable[Tuple]:
+        for ev in self:
+            yield ev.text, ev.confidence, ev.award_hint, ev.tweet_id, ev.user
+
+    def __repr__(self) -> str:
+        return f"EvidenceStore(entries={len(self._entries)}, mentions={self.mentions}, total={self.total})"
 
 @dataclass
 class Cluster:
     role: str
     canonical: str
     aliases: List[str] = field(default_factory=list)
-    evidence: List[Evidence] = field(default_factory=list)
+    evidence: EvidenceStore = field(default_factory=EvidenceStore)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.evidence, EvidenceStore):
+            self.evidence = EvidenceStore(self.evidence)
 
     def total_confidence(self) -> int:
-        return sum(e.confidence for e in self.evidence)
+        return self.evidence.total
+
+    def hits(self) -> List[Dict]:
+        """This cluster's evidence as aggregation.py hits, one per mention."""
+        kind = ROLE_KINDS.get(self.role, "MENTION")
+        entries, numbers, users, ids = self.evidence.columns()
+        return [{"tweet_id": tweet_id, "user": user, "kind": kind, "weight": entries[number][1],
+                 "text": entries[number][0], "award_hint": entries[number][2]}
+                for number, user, tweet_id in zip(numbers, users, ids)]
 
 # ---------- Normalization helpers ----------
 WS_RE = re.compile(r"\s+")
@@ -69,7 +177,10 @@ def _basic_clean(s: str) -> str:
     return s
 
 def _normalize_for_match(raw: str) -> Tuple[str, List[str]]:
-    s = _basic_clean(raw)
+    return _match_tokens(_basic_clean(raw))
+
+def _match_tokens(s: str) -> Tuple[str, List[str]]:
+    # _normalize_for_match on an already _basic_clean'ed string
     low = s.lower()
     toks = [t for t in re.findall(r"[a-z0-9][a-z0-9\-']*", low) if t]
     toks = [t for t in toks if t not in NOISE_TOKENS]
@@ -83,27 +194,89 @@ def _title_case(s: str) -> str:
 # ---------- Name/alias utilities ----------
 def _name_parts(s: str) -> Tuple[List[str], Optional[str], Optional[str]]:
     """Return (tokens, first, last) from a display string."""
-    s = _basic_clean(s)
+    return _name_tokens(_basic_clean(s))
+
+def _name_tokens(s: str) -> Tuple[List[str], Optional[str], Optional[str]]:
+    # _name_parts on an already _basic_clean'ed string
     toks = [t for t in re.findall(r"[A-Za-z][A-Za-z\-']*", s)]
     if not toks:
         return [], None, None
     return toks, toks[0], toks[-1]
 
 def _is_personish(s: str) -> bool:
-    toks, first, last = _name_parts(s)
+    return _personish_tokens(_name_parts(s)[0])
+
+def _personish_tokens(toks: List[str]) -> bool:
     # Person-like if has at least 2 tokens and most tokens start uppercase
     if len(toks) >= 2:
         cap = sum(1 for t in toks if t[0].isupper())
         return cap / len(toks) >= 0.6
     return False
 
+# ---------- Memoized surface features ----------
+FEATURE_CACHE_SIZE = 200_000
+
+class SurfaceFeatures:
+    """
+    Everything matching derives from one surface string, computed once:
+    _basic_clean form, _normalize_for_match key and tokens, _name_parts
+    tokens/first/last and the _is_personish flag.
+    """
+    __slots__ = ("clean", "norm", "toks", "tokset", "name_toks", "first", "last", "personish")
+
+    def __init__(self, surface: str) -> None:
+        self.clean = _basic_clean(surface)
+        self.norm, toks = _match_tokens(self.clean)
+        self.toks = tuple(toks)
+        self.tokset = frozenset(toks)
+        name_toks, self.first, self.last = _name_tokens(self.clean)
+        self.name_toks = tuple(name_toks)
+        self.personish = _personish_tokens(name_toks)
+
+class FeatureCache:
+    """Bounded LRU map surface -> SurfaceFeatures, with hit/miss counters."""
+    def __init__(self, maxsize: int = FEATURE_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, SurfaceFeatures]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, surface: str) -> SurfaceFeatures:
+        rec = self._data.get(surface)
+        if rec is not None:
+            self._data.move_to_end(surface)
+            self.hits += 1
+            return rec
+        self.misses += 1
+        rec = self._data[surface] = SurfaceFeatures(surface)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return rec
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+FEATURES = FeatureCache()
+
+def _features(surface: str) -> SurfaceFeatures:
+    return FEATURES.get(surface)
+
 def _gen_alias_candidates(canonical: str) -> List[str]:
     """Generate likely aliases automatically from the canonical form."""
-    toks, first, last = _name_parts(canonical)
+    f = _features(canonical)
+    toks, first, last = f.name_toks, f.first, f.last
     al = set()
     disp = _title_case(canonical)
     al.add(disp)
-    if _is_personish(canonical) and first and last:
+    if f.personish and first and last:
         # common person aliases
         al.add(f"{first} {last}")
         al.add(last)                 # last-name only
@@ -131,12 +304,352 @@ def _string_ratio(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
 def name_similarity(a_raw: str, b_raw: str) -> float:
-    anorm, atoks = _normalize_for_match(a_raw)
-    bnorm, btoks = _normalize_for_match(b_raw)
-    jac = _token_jaccard(atoks, btoks)
-    rat = _string_ratio(anorm, bnorm)
+    return _feature_similarity(_features(a_raw), _features(b_raw))
+
+def _feature_similarity(a: SurfaceFeatures, b: SurfaceFeatures) -> float:
+    # name_similarity on precomputed features
+    A, B = a.tokset, b.tokset
+    jac = len(A & B) / len(A | B) if A and B else 0.0
+    rat = _string_ratio(a.norm, b.norm)
     return 0.6 * rat + 0.4 * jac
 
+# ---------- N-gram batch similarity ----------
+NGRAM_SIZE = 2
+NGRAM_TOP_K = 8       # clusters scorer="ngram" shortlists per surface
+NGRAM_BATCH = 512     # mentions whose alias-index misses are scored in one NgramIndex pass
+SCORERS = ("ratio", "ngram")
+
+def _char_ngrams(norm: str, n: int = NGRAM_SIZE) -> List[str]:
+    padded = f" {norm} "
+    return sorted({padded[i:i + n] for i in range(len(padded) - n + 1)})
+
+class _IntColumn:
+    """Append-only int64 NumPy column with amortized O(1) growth."""
+    __slots__ = ("data", "size")
+
+    def __init__(self, capacity: int = 1024) -> None:
+        import numpy as np
+        self.data = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    def extend(self, values: List[int]) -> None:
+        import numpy as np
+        n = len(values)
+        if self.size + n > len(self.data):
+            grown = np.empty(max(2 * len(self.data), self.size + n), dtype=np.int64)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:self.size + n] = values
+        self.size += n
+
+    def view(self):
+        return self.data[:self.size]
+
+def _ragged_take(indices, indptr, rows):
+    # concatenated indices[indptr[r]:indptr[r + 1]] for r in rows, and each row's length
+    import numpy as np
+    starts, lens = indptr[rows], indptr[rows + 1] - indptr[rows]
+    offsets = np.cumsum(lens) - lens
+    pos = np.arange(int(lens.sum())) - np.repeat(offsets - starts, lens)
+    return indices[pos], lens
+
+class NgramIndex:
+    """
+    Surfaces as sparse binary vectors of character bigrams (of the
+    _normalize_for_match key, padded with a space each side) and of tokens,
+    stored CSR-style in NumPy columns; one row per distinct key.
+
+    Scores are 0.6 * bigram Dice + 0.4 * token Jaccard, i.e. name_similarity
+    with Dice standing in for SequenceMatcher.ratio. They run lower than
+    name_similarity and rank some pairs differently, so they are not
+    compared with sim_threshold: cluster_candidates only uses them to pick
+    which clusters name_similarity scores.
+    """
+    def __init__(self) -> None:
+        self._rows: Dict[str, int] = {}       # match key -> row
+        self.keys: List[str] = []             # row -> match key
+        self._gram_ids: Dict[str, int] = {}
+        self._tok_ids: Dict[str, int] = {}
+        self._grams, self._gram_ptr = _IntColumn(), _IntColumn()
+        self._toks, self._tok_ptr = _IntColumn(), _IntColumn()
+        self._gram_ptr.extend([0])
+        self._tok_ptr.extend([0])
+        self._postings = None                 # token -> rows, built on demand by top_k
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _encode(self, surface: str, grow: bool = False):
+        # (sorted bigram ids, bigram count, sorted token ids, token count); unseen ids are dropped unless grow
+        f = _features(surface)
+        grams, toks = _char_ngrams(f.norm), sorted(f.tokset)
+        if grow:
+            for g in grams:
+                self._gram_ids.setdefault(g, len(self._gram_ids))
+            for t in toks:
+                self._tok_ids.setdefault(t, len(self._tok_ids))
+        gids = sorted(self._gram_ids[g] for g in grams if g in self._gram_ids)
+        tids = sorted(self._tok_ids[t] for t in toks if t in self._tok_ids)
+        return gids, len(grams), tids, len(toks)
+
+    def add(self, surface: str) -> int:
+        """Row of surface's match key, adding it if new."""
+        key = _features(surface).norm
+        row = self._rows.get(key)
+        if row is None:
+            gids, _, tids, _ = self._encode(surface, grow=True)
+            row = self._rows[key] = len(self.keys)
+            self.keys.append(key)
+            self._grams.extend(gids)
+            self._gram_ptr.extend([self._grams.size])
+            self._toks.extend(tids)
+            self._tok_ptr.extend([self._toks.size])
+            self._postings = None
+        return row
+
+    def score(self, surface: str, rows, shared_token: bool = False):
+        """
+        Scores of surface against the given rows, as a float array; with
+        shared_token, also whether each row shares a token with surface.
+        """
+        import numpy as np
+        rows = np.asarray(rows, dtype=np.int64)
+        gids, n_grams, tids, n_toks = self._encode(surface)
+        grams, g_lens = _ragged_take(self._grams.view(), self._gram_ptr.view(), rows)
+        toks, t_lens = _ragged_take(self._toks.view(), self._tok_ptr.view(), rows)
+        owner_g = np.repeat(np.arange(len(rows)), g_lens)
+        owner_t = np.repeat(np.arange(len(rows)), t_lens)
+        g_inter = np.bincount(owner_g, weights=np.isin(grams, gids), minlength=len(rows))
+        t_inter = np.bincount(owner_t, weights=np.isin(toks, tids), minlength=len(rows))
+        scores = self._combine(g_inter, n_grams + g_lens, t_inter, n_toks + t_lens - t_inter)
+        return (scores, t_inter > 0) if shared_token else scores
+
+    @staticmethod
+    def _combine(g_inter, g_total, t_inter, t_union):
+        import numpy as np
+        dice = 2 * g_inter / g_total
+        jac = np.divide(t_inter, t_union, out=np.zeros(len(t_inter)), where=t_union > 0)
+        return 0.6 * dice + 0.4 * jac
+
+    def _token_postings(self):
+        # CSR token -> rows, rebuilt after rows are added
+        import numpy as np
+        if self._postings is None:
+            toks, ptr = self._toks.view(), self._tok_ptr.view()
+            owner = np.repeat(np.arange(len(self.keys)), np.diff(ptr))
+            order = np.argsort(toks, kind="stable")
+            counts = np.bincount(toks, minlength=len(self._tok_ids))
+            self._postings = (owner[order], np.concatenate(([0], np.cumsum(counts))))
+        return self._postings
+
+    def candidates(self, surfaces: List[str]):
+        """
+        Every (surface, row) pair sharing a token, scored in one pass over
+        the batch: (surface index, row, score) arrays, ordered by surface
+        index and row. A row sharing no token scores at most 0.6.
+
+        The token counts shared by each pair are one sparse product of the
+        batch's token vectors with the stored ones (each surface token
+        expanded to its posting list, pairs counted); the shared bigrams of
+        those pairs are then counted in one more pass.
+        """
+        import numpy as np
+        enc = [self._encode(s) for s in surfaces]
+        q_gram_ptr = np.concatenate(([0], np.cumsum([len(e[0]) for e in enc]))).astype(np.int64)
+        q_tok_ptr = np.concatenate(([0], np.cumsum([len(e[2]) for e in enc]))).astype(np.int64)
+        q_grams = np.fromiter((g for e in enc for g in e[0]), dtype=np.int64, count=int(q_gram_ptr[-1]))
+        q_toks = np.fromiter((t for e in enc for t in e[2]), dtype=np.int64, count=int(q_tok_ptr[-1]))
+        n_grams = np.array([e[1] for e in enc], dtype=np.int64)
+        n_toks = np.array([e[3] for e in enc], dtype=np.int64)
+
+        # tokens: (surface, row) for every shared token, then counted per pair
+        rows_of, ptr = self._token_postings()
+        hit_rows, lens = _ragged_take(rows_of, ptr, q_toks)
+        hit_q = np.repeat(np.repeat(np.arange(len(surfaces)), np.diff(q_tok_ptr)), lens)
+        n_rows = max(len(self.keys), 1)
+        pairs, t_inter = np.unique(hit_q * n_rows + hit_rows, return_counts=True)
+        q, rows = pairs // n_rows, pairs % n_rows
+
+        # bigrams of each pair: the row's, marked where the surface has them too
+        grams, g_lens = _ragged_take(self._grams.view(), self._gram_ptr.view(), rows)
+        mine, m_lens = _ragged_take(q_grams, q_gram_ptr, q)
+        n_ids = max(len(self._gram_ids), 1)
+        pair = np.arange(len(rows))
+        shared = np.isin(np.repeat(pair, g_lens) * n_ids + grams, np.repeat(pair, m_lens) * n_ids + mine)
+        g_inter = np.bincount(np.repeat(pair, g_lens), weights=shared, minlength=len(rows))
+        t_lens = np.diff(self._tok_ptr.view())[rows]
+        scores = self._combine(g_inter, n_grams[q] + g_lens, t_inter, n_toks[q] + t_lens - t_inter)
+        return q, rows, scores
+
+    def top_k(self, surfaces: List[str], k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        The k best-scoring stored keys for each surface, best first (ties by
+        row), from one candidates() pass over the batch. Only keys sharing a
+        token are candidates: any other key scores at most 0.6.
+        """
+        import numpy as np
+        out: List[List[Tuple[str, float]]] = [[] for _ in surfaces]
+        if not surfaces or not self.keys:
+            return out
+        q, rows, scores = self.candidates(surfaces)
+        order = np.lexsort((rows, -scores, q))
+        q, rows, scores = q[order], rows[order], scores[order]
+        rank = np.arange(len(q)) - np.searchsorted(q, q)
+        for i in np.flatnonzero(rank < k):
+            out[q[i]].append((self.keys[rows[i]], float(scores[i])))
+        return out
+
+# ---------- Candidate blocking ----------
+class CandidateIndex:
+    """
+    Blocking index over one role's clusters, so a surface that misses the
+    alias index is scored against a shortlist instead of every cluster.
+
+    A cluster is listed under each normalized token of its canonical form and
+    aliases, and (if its canonical form is person-like) under its last name.
+    A cluster sharing no token with a surface has token Jaccard 0, so
+    name_similarity can give it at most 0.6: it can never reach a
+    sim_threshold above that. The last-name buckets keep every cluster the
+    person rule (last name + first initial) could accept on the shortlist.
+
+    Given an NgramIndex, the canonical form and aliases of each cluster are
+    also added to it, and ngram_shortlist() gives the clusters whose rows
+    score best against a surface. prefetch() scores a batch of surfaces in
+    one NgramIndex.candidates() pass; rows added after it are scored as
+    they are needed.
+    """
+    def __init__(self, ngrams: Optional[NgramIndex] = None) -> None:
+        self.clusters: List[Cluster] = []
+        self.ngrams = ngrams
+        self._order: Dict[int, int] = {}               # id(cluster) -> position in self.clusters
+        self._surfaces: List[Dict[str, None]] = []     # distinct aliases per cluster, in order
+        self._firsts: List[set] = []                   # first match tokens (names or initials) of person-like names per cluster
+        self._rows: List[Dict[int, None]] = []         # NgramIndex rows per cluster
+        self._row_clusters: Dict[int, List[int]] = defaultdict(list)  # NgramIndex row -> clusters
+        self._prefetched: Dict[str, Tuple] = {}        # surface -> (rows, scores) from prefetch()
+        self._prefetched_rows = 0                      # NgramIndex rows when prefetch() ran
+        self._by_token: Dict[str, set] = defaultdict(set)
+        self._by_last: Dict[str, set] = defaultdict(set)
+
+    def add_cluster(self, cl: Cluster) -> None:
+        i = len(self.clusters)
+        self.clusters.append(cl)
+        self._order[id(cl)] = i
+        self._surfaces.append({})
+        self._firsts.append(set())
+        self._rows.append({})
+        if self.ngrams is not None:
+            self._add_row(i, self.ngrams.add(cl.canonical))
+        f = _features(cl.canonical)
+        for t in f.toks:
+            self._by_token[t].add(i)
+        if f.personish:
+            self._by_last[f.last.lower()].add(i)
+            if len(f.toks) >= 2:
+                self._firsts[i].add(f.toks[0])
+        for a in cl.aliases:
+            self.add_alias(cl, a)
+
+    def add_alias(self, cl: Cluster, surface: str) -> None:
+        i = self._order[id(cl)]
+        if surface in self._surfaces[i]:
+            return
+        self._surfaces[i][surface] = None
+        if self.ngrams is not None:
+            self._add_row(i, self.ngrams.add(surface))
+        f = _features(surface)
+        for t in f.toks:
+            self._by_token[t].add(i)
+        if f.personish and len(f.toks) >= 2:
+            self._firsts[i].add(f.toks[0])
+
+    def _add_row(self, i: int, row: int) -> None:
+        if row not in self._rows[i]:
+            self._rows[i][row] = None
+            self._row_clusters[row].append(i)
+
+    def same_person(self, cl: Cluster, f: SurfaceFeatures) -> bool:
+        """
+        Whether a name can belong with the person-like names the cluster
+        holds. Its first name must be one of their full first names up to a
+        typo (SequenceMatcher.ratio >= FIRST_NAME_MIN_RATIO), or go by
+        initials where it or all of them are only initials. A bare single
+        name fits no cluster holding person-like names: it may be any of the
+        people sharing it. Clusters holding no person-like name accept any.
+        """
+        held = self._firsts[self._order[id(cl)]]
+        if not held or not f.toks:
+            return True
+        if len(f.toks) == 1:
+            return False
+        first = f.toks[0]
+        if len(first) == 1:
+            return any(h[0] == first for h in held)
+        full = [h for h in held if len(h) > 1]
+        if not full:
+            return first[0] in held
+        return any(_string_ratio(first, h) >= FIRST_NAME_MIN_RATIO for h in full)
+
+    def aliases(self, cl: Cluster) -> Iterable[str]:
+        """The cluster's aliases without repeats (max similarity is unchanged)."""
+        return self._surfaces[self._order[id(cl)]]
+
+    def _shortlist_ids(self, raw: str) -> List[int]:
+        f = _features(raw)
+        hits = set()
+        for t in f.toks:
+            hits.update(self._by_token.get(t, ()))
+        last = f.last
+        if last:
+            hits.update(self._by_last.get(last.lower(), ()))
+        return sorted(hits)
+
+    def shortlist(self, raw: str) -> List[Cluster]:
+        """Clusters sharing a token or the last name with raw, in creation order."""
+        return [self.clusters[i] for i in self._shortlist_ids(raw)]
+
+    def prefetch(self, surfaces: Iterable[str]) -> None:
+        """Score surfaces against every NgramIndex row so far, in one batch."""
+        surfaces = list(dict.fromkeys(surfaces))
+        self._prefetched_rows = len(self.ngrams)
+        self._prefetched = {}
+        if not surfaces or not self._prefetched_rows:
+            return
+        q, rows, scores = self.ngrams.candidates(surfaces)
+        bounds = q.searchsorted(range(len(surfaces) + 1))
+        for j, s in enumerate(surfaces):
+            self._prefetched[s] = (rows[bounds[j]:bounds[j + 1]], scores[bounds[j]:bounds[j + 1]])
+
+    def ngram_shortlist(self, raw: str, k: int) -> List[Cluster]:
+        """
+        The k clusters with the best-scoring NgramIndex row for raw (rows
+        sharing a token with it), plus every cluster listed under raw's last
+        name (the ones the person rule could accept), in creation order.
+        Uses the prefetch() scores when raw was in the batch, and scores
+        newer rows here.
+        """
+        import numpy as np
+        found = self._prefetched.get(raw)
+        since = self._prefetched_rows if found is not None else 0
+        if found is None:
+            found = (np.empty(0, dtype=np.int64), np.empty(0))
+        rows, scores = [found[0]], [found[1]]
+        if since < len(self.ngrams):
+            new = np.arange(since, len(self.ngrams))
+            s, shared = self.ngrams.score(raw, new, shared_token=True)
+            rows.append(new[shared])
+            scores.append(s[shared])
+        best: Dict[int, float] = {}
+        for row, s in zip(np.concatenate(rows).tolist(), np.concatenate(scores).tolist()):
+            for i in self._row_clusters[row]:
+                if s > best.get(i, -1.0):
+                    best[i] = s
+        top = set(sorted(best, key=lambda i: (-best[i], i))[:k])
+        last = _features(raw).last
+        if last:
+            top.update(self._by_last.get(last.lower(), ()))
+        return [self.clusters[i] for i in sorted(top)]
+
 # ---------- Ticket iterator ----------
 def _iter_candidates_from_tickets(
     tickets: List[Dict], valid_roles: Iterable[str] = DEFAULT_ROLE_KEYS
@@ -148,104 +661,373 @@ def _iter_candidates_from_tickets(
                 continue
             if role not in valid_roles and role is not None:
                 continue
-            yield name, (role or "nominee"), Evidence(text=name, confidence=conf, award_hint=hint)
+            yield name, (role or "nominee"), Evidence(text=name, confidence=conf, award_hint=hint,
+                                                      tweet_id=t.get("id"), user=t.get("user"))
+
+# ---------- Alias snapshots ----------
+SNAPSHOT_VERSION = 2
+SNAPSHOT_KEEP_RUNS = 5  # snapshot entries not seen in this many runs are dropped
+
+def _snapshot_fingerprint() -> List:
+    # anything that changes the alias keys makes old snapshots stale
+    return [SNAPSHOT_VERSION, sorted(NOISE_TOKENS)]
+
+def load_alias_snapshot(path: str) -> Optional[Dict[str, List[Dict]]]:
+    """
+    Per-role snapshot entries ({"canonical", "surfaces", "award",
+    "last_seen"}) saved by save_alias_snapshot, or None if the file is
+    missing or stale. "award" is the award hint of the split_by_award part
+    the cluster was found in (None when the role was not split).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return None
+    if saved.get("fingerprint") != _snapshot_fingerprint():
+        return None
+    return saved.get("roles", {})
+
+def save_alias_snapshot(path: str, roles: Dict[str, List[Dict]]) -> None:
+    """Atomically write per-role snapshot entries to path."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": _snapshot_fingerprint(), "roles": roles}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def _snapshot_run(seeds: Dict[str, List[Dict]]) -> int:
+    # runs are numbered from 1; this one comes after the latest last_seen
+    return 1 + max((e["last_seen"] for entries in seeds.values() for e in entries), default=0)
+
+def _merge_snapshot_entries(seed: List[Dict], found: List[Dict], run: int) -> List[Dict]:
+    """
+    One part's snapshot entries after a run: one per cluster the run found,
+    then the seed entries no cluster took up, unless those were last seen
+    SNAPSHOT_KEEP_RUNS or more runs ago.
+    """
+    used = {i for e in found for i in e["seeds"]}
+    out = [{"canonical": e["canonical"], "surfaces": e["surfaces"], "last_seen": run} for e in found]
+    out.extend(e for i, e in enumerate(seed) if i not in used and run - e["last_seen"] < SNAPSHOT_KEEP_RUNS)
+    return out
 
 # ---------- Core clustering with automatic alias discovery ----------
+SPLIT_MIN_CANDIDATES = 5000  # split_by_award only splits roles with at least this many mentions
+FIRST_NAME_MIN_RATIO = 0.75  # a seeded surface's first name vs the cluster's (CandidateIndex.same_person)
+
 def cluster_candidates(
     tickets: List[Dict],
     sim_threshold: float = 0.88,
     alias_hit_threshold: float = 0.90,
-    roles: Iterable[str] = DEFAULT_ROLE_KEYS
+    roles: Iterable[str] = DEFAULT_ROLE_KEYS,
+    blocking: bool = True,
+    scorer: str = "ratio",
+    workers: int = 1,
+    split_by_award: bool = False,
+    snapshot: Optional[str] = None,
+    update_snapshot: bool = True
 ) -> Dict[str, List[Cluster]]:
     """
     Build clusters per role (winner/nominee/presenter/host) with automatic alias discovery.
     Returns: { role: [Cluster, ...], ... }
+
+    With blocking (the default) a surface that misses the alias index is only
+    scored against the clusters a CandidateIndex shortlists, instead of every
+    cluster of its role. Any match reaching sim_threshold is still found.
+    The person rule looks at the best cluster overall. So when it would
+    accept the shortlist's best, the clusters off the shortlist that could
+    still score higher are checked too, and the result is the same as the
+    full scan. blocking=False keeps the full scan, and so does a
+    sim_threshold of 0.6 or less.
+
+    scorer="ngram" shortlists differently: every NGRAM_BATCH mentions, the
+    surfaces the alias index misses are scored against all clusters in one
+    NgramIndex pass, and each is then scored with name_similarity against
+    only its NGRAM_TOP_K best clusters and the clusters sharing its last
+    name. blocking does not apply. On big roles this scores far fewer
+    aliases than blocking does, and thresholds keep their meaning. The
+    person rule is checked against the best cluster overall, as with
+    blocking. The result can differ from the full scan only when a cluster
+    off the shortlist reaches sim_threshold with a higher score.
+
+    Roles never share clusters, so with workers > 1 each role is clustered in
+    its own worker process; the result is identical to workers=1.
+    split_by_award=True also clusters each award hint of a role separately
+    (for roles with at least SPLIT_MIN_CANDIDATES mentions), which spreads
+    big roles over more workers but changes the result: the same name under
+    two award hints becomes two clusters.
+
+    snapshot is the path of an alias snapshot (see save_alias_snapshot),
+    which holds the exact surfaces of each cluster of earlier runs. A mention
+    of one of them goes straight to its cluster, which is created on its
+    first mention as a new cluster would be, so rerunning on the same
+    tickets gives the same clusters. A seeded mention whose first name does
+    not fit the person names its cluster holds (or a bare last name, which
+    may be any of them) is placed as without a seed instead, so a run that
+    mixed people up does not pass that on. Surfaces that ended up in more
+    than one cluster are not kept, and seeded clusters that get no evidence
+    in this run are left out of the result. With update_snapshot the file is
+    rewritten afterwards with every cluster of this run plus the older
+    entries seen in the last SNAPSHOT_KEEP_RUNS runs. A missing or stale
+    snapshot is ignored.
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"scorer must be one of {SCORERS}, got {scorer!r}")
+    roles = list(roles)
+    blocking = blocking and sim_threshold > 0.6
+
+    # partition mentions by role (and award hint), keeping ticket order
+    parts: Dict[Tuple[str, Optional[str]], List[Tuple[int, str, Evidence]]] = {(r, None): [] for r in roles}
+    for seq, (raw_name, role, ev) in enumerate(_iter_candidates_from_tickets(tickets, roles)):
+        parts[(role, None)].append((seq, raw_name, ev))
+    if split_by_award:
+        for r in roles:
+            mentions = parts[(r, None)]
+            if len(mentions) >= SPLIT_MIN_CANDIDATES:
+                del parts[(r, None)]
+                for item in mentions:
+                    parts.setdefault((r, item[2].award_hint), []).append(item)
+
+    seeds = (load_alias_snapshot(snapshot) or {}) if snapshot else {}
+    want_snapshot = bool(snapshot and update_snapshot)
+    work = partial(_cluster_role, sim_threshold=sim_threshold, alias_hit_threshold=alias_hit_threshold,
+                   blocking=blocking, scorer=scorer, snapshot=want_snapshot)
+    jobs = [(role, mentions, [e for e in seeds.get(role, ()) if e["award"] == hint])
+            for (role, hint), mentions in parts.items()]
+    if workers > 1 and len(jobs) > 1:
+        import multiprocessing
+        # biggest partitions first so they are not left for last
+        order = sorted(range(len(jobs)), key=lambda k: -len(jobs[k][1]))
+        with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+            done = pool.starmap(work, [jobs[k] for k in order], chunksize=1)
+        results = [None] * len(jobs)
+        for k, res in zip(order, done):
+            results[k] = res
+    else:
+        results = [work(*job) for job in jobs]
+
+    clusters_by_role: Dict[str, List[Tuple[int, Cluster]]] = {r: [] for r in roles}
+    entries: Dict[str, List[Dict]] = {r: [] for r in roles}
+    run = _snapshot_run(seeds)
+    for (role, hint), (_, _, seed), (found, known) in zip(parts, jobs, results):
+        clusters_by_role[role].extend(found)
+        if want_snapshot:
+            entries[role].extend(dict(e, award=hint) for e in _merge_snapshot_entries(seed, known, run))
+    if want_snapshot:
+        for r in roles:
+            # parts this run did not have keep their old entries, until they are pruned
+            entries[r].extend(e for e in seeds.get(r, ()) if (r, e["award"]) not in parts
+                              and run - e["last_seen"] < SNAPSHOT_KEEP_RUNS)
+        # roles this run did not cover keep their old entries
+        save_alias_snapshot(snapshot, {**seeds, **entries})
+    # clusters in order of their first mention, as a single pass would create them
+    return {r: [cl for _, cl in sorted(found, key=lambda x: x[0])] for r, found in clusters_by_role.items()}
+
+def _cluster_role(
+    role: str,
+    mentions: List[Tuple[int, str, Evidence]],
+    seed: Optional[List[Dict]] = None,
+    sim_threshold: float = 0.88,
+    alias_hit_threshold: float = 0.90,
+    blocking: bool = True,
+    scorer: str = "ratio",
+    snapshot: bool = False
+) -> Tuple[List[Tuple[int, Cluster]], Optional[List[Dict]]]:
+    """
+    The single pass of cluster_candidates over one role's (seq, name,
+    evidence) mentions, starting from the seed snapshot entries if given.
+    Returns (seq of first mention, cluster) pairs for the clusters that got
+    evidence, and (if snapshot) their snapshot entries, each with the
+    indexes of the seed entries it took up as "seeds".
     """
-    clusters_by_role: Dict[str, List[Cluster]] = {r: [] for r in roles}
+    clusters: List[Tuple[int, Cluster]] = []
+    candidate_index = CandidateIndex(NgramIndex() if scorer == "ngram" else None)
 
-    # alias index: role -> normalized key -> cluster
-    alias_index: Dict[str, Dict[str, Cluster]] = {r: {} for r in roles}
+    # alias index: normalized key -> cluster
+    alias_index: Dict[str, Cluster] = {}
 
-    def _index_alias(role: str, surface: str, cluster: Cluster):
+    # surface -> index of the seed entry holding it; seeded[i] is that entry's cluster once mentioned
+    seed_of: Dict[str, int] = {}
+    for i, entry in enumerate(seed or ()):
+        for s in entry["surfaces"]:
+            seed_of[s] = i
+    seeded: Dict[int, Cluster] = {}
+
+    def _index_alias(surface: str, cluster: Cluster):
         # index multiple normalizations for robust future matches
-        surf_clean = _basic_clean(surface)
-        k1, toks = _normalize_for_match(surf_clean)
+        surf_clean = _features(surface).clean
+        k1 = _features(surf_clean).norm
         keys = {k1, surf_clean.lower()}
         for a in _gen_alias_candidates(surface):
-            k, _ = _normalize_for_match(a)
+            k = _features(a).norm
             keys.add(k)
             keys.add(a.lower())
         for k in keys:
             if k:
-                alias_index[role][k] = cluster
+                alias_index[k] = cluster
+
+    def _new_cluster(seq: int, raw_name: str, ev: Evidence) -> Cluster:
+        # make a new cluster and index its aliases
+        canonical = _choose_canonical_auto([raw_name])
+        cl = Cluster(role=role, canonical=canonical, aliases=[raw_name], evidence=[ev])
+        clusters.append((seq, cl))
+        candidate_index.add_cluster(cl)
+        # index canonical + generated aliases
+        _index_alias(canonical, cl)
+        for a in _gen_alias_candidates(canonical):
+            _index_alias(a, cl)
+        # also index the raw surface
+        _index_alias(raw_name, cl)
+        return cl
 
-    for raw_name, role, ev in _iter_candidates_from_tickets(tickets, roles):
+    for pos, (seq, raw_name, ev) in enumerate(mentions):
+        if scorer == "ngram" and pos % NGRAM_BATCH == 0:
+            # a surface the alias index finds now it will always find, so only misses need scores
+            candidate_index.prefetch(
+                s for _, s, _ in mentions[pos:pos + NGRAM_BATCH]
+                if _features(s).norm not in alias_index and _features(s).clean.lower() not in alias_index)
         # quick normalized key for alias lookup
-        base_norm, _ = _normalize_for_match(raw_name)
+        raw_f = _features(raw_name)
         # 1) alias index hit
-        hit_cluster = alias_index[role].get(base_norm)
+        hit_cluster = alias_index.get(raw_f.norm)
         if not hit_cluster:
             # 2) try looser alias keys (lowercased form)
-            hit_cluster = alias_index[role].get(_basic_clean(raw_name).lower())
+            hit_cluster = alias_index.get(raw_f.clean.lower())
 
-        placed = False
+        # 0) a seeded surface goes to its cluster once that has a mention, unless its first
+        #    name does not fit the person names the cluster holds (the seed may come from a
+        #    run that mixed people up); where the alias index points elsewhere, the seeding
+        #    run got there by similarity
+        i = seed_of.get(raw_name)
+        seeded_cluster = seeded.get(i)
+        if seeded_cluster is not None and not candidate_index.same_person(seeded_cluster, raw_f):
+            seeded_cluster = None
+        if seeded_cluster is not None and seeded_cluster is not hit_cluster:
+            seeded_cluster.aliases.append(raw_name)
+            seeded_cluster.evidence.append(ev)
+            candidate_index.add_alias(seeded_cluster, raw_name)
+            _index_alias(raw_name, seeded_cluster)
+            continue
+
+        placed = None
         if hit_cluster:
             hit_cluster.aliases.append(raw_name)
             hit_cluster.evidence.append(ev)
-            placed = True
+            candidate_index.add_alias(hit_cluster, raw_name)
+            placed = hit_cluster
         else:
             # 3) similarity to existing clusters (canonical or aliases)
             best_sim, best_cluster = 0.0, None
-            for cl in clusters_by_role[role]:
-                s1 = name_similarity(raw_name, cl.canonical)
-                s2 = max([name_similarity(raw_name, a) for a in cl.aliases] or [0.0])
-                s = max(s1, s2)
+            if scorer == "ngram":
+                shortlist = candidate_index.ngram_shortlist(raw_name, NGRAM_TOP_K)
+            elif blocking:
+                shortlist = candidate_index.shortlist(raw_name)
+            else:
+                shortlist = candidate_index.clusters
+            for cl in shortlist:
+                s = _cluster_similarity(raw_f, cl, candidate_index)
                 if s > best_sim:
                     best_sim, best_cluster = s, cl
 
-            # 3a) person-style rule: last name match + first initial match
-            if best_sim < sim_threshold and _is_personish(best_cluster.canonical if best_cluster else ""):
-                cand_toks, c_first, c_last = _name_parts(raw_name)
-                cl_toks, cl_first, cl_last = _name_parts(best_cluster.canonical) if best_cluster else ([], None, None)
-                if c_last and cl_last and c_last.lower() == cl_last.lower():
-                    if not c_first or not cl_first or c_first[0].lower() == cl_first[0].lower():
-                        best_sim = alias_hit_threshold
+            # 3a) person-style rule: last name match + first initial match, against the
+            #     best cluster overall; a shortlist holds every cluster that can reach
+            #     sim_threshold, but its best below that need not be the best overall
+            if best_sim < sim_threshold and _person_rule(raw_f, best_cluster) \
+                    and shortlist is not candidate_index.clusters:
+                best_sim, best_cluster = _best_overall(raw_f, candidate_index, shortlist, best_sim, best_cluster)
+            if best_sim < sim_threshold and _person_rule(raw_f, best_cluster):
+                best_sim = alias_hit_threshold
             # 4) attach or create
             if best_cluster and best_sim >= sim_threshold:
                 best_cluster.aliases.append(raw_name)
                 best_cluster.evidence.append(ev)
-                placed = True
+                candidate_index.add_alias(best_cluster, raw_name)
+                placed = best_cluster
                 # index this new alias for future matches
-                _index_alias(role, raw_name, best_cluster)
-
-        if not placed:
-            # make a new cluster and index its aliases
-            canonical = _choose_canonical_auto([raw_name])
-            cl = Cluster(role=role, canonical=canonical, aliases=[raw_name], evidence=[ev])
-            clusters_by_role[role].append(cl)
-            # index canonical + generated aliases
-            _index_alias(role, canonical, cl)
-            for a in _gen_alias_candidates(canonical):
-                _index_alias(role, a, cl)
-            # also index the raw surface
-            _index_alias(role, raw_name, cl)
+                _index_alias(raw_name, best_cluster)
+
+        if placed is None:
+            placed = _new_cluster(seq, raw_name, ev)
+        if i is not None:
+            # the first mention of a seeded surface is placed as without a seed
+            seeded.setdefault(i, placed)
 
     # final tidy per cluster
-    for role, cls in clusters_by_role.items():
-        for cl in cls:
-            # clean canonical
-            cl.canonical = _choose_canonical_auto([cl.canonical, *cl.aliases])
-            # dedupe aliases
-            seen = set()
-            unique = []
-            for a in cl.aliases:
-                key = _basic_clean(a).lower()
-                if key not in seen:
-                    unique.append(a)
-                    seen.add(key)
-            cl.aliases = unique
-
-    return clusters_by_role
+    for _, cl in clusters:
+        # clean canonical
+        cl.canonical = _choose_canonical_auto([cl.canonical, *cl.aliases])
+        # dedupe aliases
+        seen = set()
+        unique = []
+        for a in cl.aliases:
+            key = _features(a).clean.lower()
+            if key not in seen:
+                unique.append(a)
+                seen.add(key)
+        cl.aliases = unique
+
+    entries = None
+    if snapshot:
+        # exact surfaces only (generated aliases and keys go stale as clusters change),
+        # and none that this run put in more than one cluster
+        owners: Dict[str, int] = defaultdict(int)
+        for _, cl in clusters:
+            for a in candidate_index.aliases(cl):
+                owners[a] += 1
+        seeds_of: Dict[int, List[int]] = defaultdict(list)
+        for i, cl in seeded.items():
+            seeds_of[id(cl)].append(i)
+        entries = []
+        for _, cl in clusters:
+            found = seeds_of[id(cl)]
+            surfaces = dict.fromkeys(s for i in found for s in seed[i]["surfaces"])
+            surfaces.update(dict.fromkeys(a for a in candidate_index.aliases(cl) if owners[a] == 1))
+            if surfaces:
+                entries.append({"canonical": cl.canonical, "surfaces": list(surfaces), "seeds": found})
+    return clusters, entries
+
+def _cluster_similarity(raw_f: SurfaceFeatures, cl: Cluster, index: CandidateIndex) -> float:
+    # best name similarity of a surface to a cluster's canonical form and aliases
+    s = _feature_similarity(raw_f, _features(cl.canonical))
+    return max([s] + [_feature_similarity(raw_f, _features(a)) for a in index.aliases(cl)])
+
+def _person_rule(raw_f: SurfaceFeatures, cl: Optional[Cluster]) -> bool:
+    # same last name, and same first initial unless either has no first name
+    if cl is None:
+        return False
+    cl_f = _features(cl.canonical)
+    if not cl_f.personish or not raw_f.last or not cl_f.last or raw_f.last.lower() != cl_f.last.lower():
+        return False
+    return not raw_f.first or not cl_f.first or raw_f.first[0].lower() == cl_f.first[0].lower()
+
+def _best_overall(
+    raw_f: SurfaceFeatures, index: CandidateIndex, shortlist: List[Cluster], best_sim: float, best: Cluster
+) -> Tuple[float, Cluster]:
+    """
+    (score, cluster) of the best cluster of the index for a surface, given
+    the best of a shortlist, as the full scan picks it (the earliest cluster
+    wins ties). Clusters off the shortlist are skipped when an upper bound on
+    their score (real_quick_ratio in place of SequenceMatcher.ratio; with
+    blocking they share no token, so only that part is left) cannot reach
+    the shortlist's best.
+    """
+    listed = {id(cl) for cl in shortlist}
+    order = index._order
+    for cl in index.clusters:
+        if id(cl) in listed:
+            continue
+        if max(_similarity_bound(raw_f, _features(a)) for a in [cl.canonical, *index.aliases(cl)]) < best_sim:
+            continue
+        s = _cluster_similarity(raw_f, cl, index)
+        if s > best_sim or (s == best_sim and order[id(cl)] < order[id(best)]):
+            best_sim, best = s, cl
+    return best_sim, best
+
+def _similarity_bound(a: SurfaceFeatures, b: SurfaceFeatures) -> float:
+    # _feature_similarity with SequenceMatcher.real_quick_ratio (lengths only) for ratio
+    A, B = a.tokset, b.tokset
+    jac = len(A & B) / len(A | B) if A and B else 0.0
+    n = len(a.norm) + len(b.norm)
+    return 0.6 * (2 * min(len(a.norm), len(b.norm)) / n if n else 1.0) + 0.4 * jac
 
 def _choose_canonical_auto(variants: List[str]) -> str:
     """
@@ -259,12 +1041,197 @@ def _choose_canonical_auto(variants: List[str]) -> str:
     # score by (is_personish, token_count, length)
     scored = []
     for v in variants:
-        toks, _, _ = _name_parts(v)
-        scored.append((1 if _is_personish(v) else 0, len(toks), len(v), v))
+        f = _features(v)
+        scored.append((1 if f.personish else 0, len(f.name_toks), len(v), v))
     scored.sort(reverse=True)
     chosen = scored[0][3]
     return _title_case(chosen)
 
+# ---------- Mergeable cluster state ----------
+class _UnionFind:
+    """Union-find over string keys; the smallest key of a set is its root."""
+    def __init__(self) -> None:
+        self.parent: Dict[str, str] = {}
+
+    def find(self, k: str) -> str:
+        parent = self.parent
+        if k not in parent:
+            parent[k] = k
+            return k
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    def union(self, a: str, b: str) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+def _strong_keys(surface: str) -> List[str]:
+    # keys that identify a name unambiguously: match key, lowercased clean form, "first last";
+    # first and last come from the match tokens, so noise ("RT", "WINS") never stands in for a name
+    f = _features(surface)
+    keys = {f.norm, f.clean.lower()}
+    if f.personish and len(f.toks) >= 2:
+        keys.add(f"{f.toks[0]} {f.toks[-1]}")
+    keys.discard("")
+    return sorted(keys) or [surface]
+
+class ClusterState:
+    """
+    Order-independent clustering state that can be built per shard of
+    tickets and merged: the same tickets give the same clusters however they
+    are split into shards and in whatever order shards are merged.
+
+    Per role it keeps a union-find over strong alias keys (match key,
+    lowercased clean form, "first last" of the noise-stripped match tokens
+    for person-like names), and per
+    surface a count of (confidence, award_hint, tweet id, user) evidence. merge() unions the
+    key sets and adds the counts, so it is associative and commutative.
+
+    Everything order-dependent in cluster_candidates is left to finalize(),
+    which works on the merged state in a fixed order: weak names (a bare last
+    name, or an initial plus last name) join the strongest person cluster with
+    that last name, then clusters are merged by name_similarity, strongest
+    first.
+    """
+    def __init__(self, roles: Iterable[str] = DEFAULT_ROLE_KEYS) -> None:
+        self.roles = set(roles)
+        self.keys: Dict[str, _UnionFind] = {r: _UnionFind() for r in self.roles}
+        # role -> surface -> (confidence, award_hint, tweet_id, user) -> mentions
+        self.surfaces: Dict[str, Dict[str, Dict[Tuple, int]]] = {r: {} for r in self.roles}
+
+    @classmethod
+    def from_tickets(cls, tickets: Iterable[Dict], roles: Iterable[str] = DEFAULT_ROLE_KEYS) -> "ClusterState":
+        state = cls(roles)
+        state.update(tickets)
+        return state
+
+    def add(self, raw_name: str, role: str, ev: Evidence) -> None:
+        counts = self.surfaces[role].get(raw_name)
+        if counts is None:
+            counts = self.surfaces[role][raw_name] = defaultdict(int)
+            keys = _strong_keys(raw_name)
+            for k in keys[1:]:
+                self.keys[role].union(keys[0], k)
+            self.keys[role].find(keys[0])
+        counts[(ev.confidence, ev.award_hint, ev.tweet_id, ev.user)] += 1
+
+    def update(self, tickets: Iterable[Dict]) -> None:
+        for raw_name, role, ev in _iter_candidates_from_tickets(tickets, self.roles):
+            self.add(raw_name, role, ev)
+
+    def merge(self, other: "ClusterState") -> "ClusterState":
+        """Fold other into this state (in place) and return it."""
+        for role in other.roles:
+            if role not in self.roles:
+                self.roles.add(role)
+                self.keys[role] = _UnionFind()
+                self.surfaces[role] = {}
+            uf = self.keys[role]
+            for k in other.keys[role].parent:
+                uf.union(k, other.keys[role].find(k))
+            mine = self.surfaces[role]
+            for surface, counts in other.surfaces[role].items():
+                into = mine.setdefault(surface, defaultdict(int))
+                for ev_key, n in counts.items():
+                    into[ev_key] += n
+        return self
+
+    def _groups(self, role: str) -> List[List[str]]:
+        uf = self.keys[role]
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for surface in self.surfaces[role]:
+            groups[uf.find(_strong_keys(surface)[0])].append(surface)
+        return [sorted(g) for g in groups.values()]
+
+    def finalize(self, sim_threshold: float = 0.88) -> Dict[str, List[Cluster]]:
+        """Clusters per role, strongest first (same shape as cluster_candidates)."""
+        out: Dict[str, List[Cluster]] = {}
+        for role in sorted(self.roles):
+            surfaces = self.surfaces[role]
+
+            def strength(group: List[str]) -> Tuple[int, int, str, List[str]]:
+                conf = sum(key[0] * n for s in group for key, n in surfaces[s].items())
+                mentions = sum(n for s in group for n in surfaces[s].values())
+                return -conf, -mentions, _choose_canonical_auto(group), sorted(group)
+
+            groups = sorted(self._groups(role), key=strength)
+            # weak names join the strongest person group with the same last name (and initial)
+            by_last: Dict[str, List[str]] = {}
+            weak = []
+            for g in groups:
+                f = _features(_choose_canonical_auto(g))
+                if f.personish and len(f.first) > 1:
+                    by_last.setdefault(f.last.lower(), g)
+                elif len(f.name_toks) == 1 or (f.personish and len(f.first) == 1):
+                    weak.append((g, f))
+            for g, f in weak:
+                target = by_last.get(f.last.lower()) if f.last else None
+                if target is None:
+                    continue
+                t_first = _features(_choose_canonical_auto(target)).first
+                if len(f.name_toks) == 1 or f.first[0].lower() == t_first[0].lower():
+                    target.extend(g)
+                    g.clear()
+            groups = sorted((g for g in groups if g), key=strength)
+
+            # similarity merges, strongest group first
+            index = CandidateIndex()
+            clusters: List[Cluster] = []
+            for g in groups:
+                canonical = _choose_canonical_auto(g)
+                best_sim, best = 0.0, None
+                if sim_threshold > 0.6:
+                    shortlist = index.shortlist(canonical)
+                else:
+                    shortlist = clusters
+                for cl in shortlist:
+                    s = max(name_similarity(canonical, a) for a in [cl.canonical, *cl.aliases])
+                    if s > best_sim:
+                        best_sim, best = s, cl
+                if best is not None and best_sim >= sim_threshold:
+                    for a in g:
+                        best.aliases.append(a)
+                        index.add_alias(best, a)
+                else:
+                    cl = Cluster(role=role, canonical=canonical, aliases=list(g))
+                    clusters.append(cl)
+                    index.add_cluster(cl)
+
+            for cl in clusters:
+                cl.canonical = _choose_canonical_auto([cl.canonical, *cl.aliases])
+                cl.aliases.sort(key=lambda a: (-sum(surfaces[a].values()), a))
+                for a in cl.aliases:
+                    # fixed order; None and mixed types (user ids vs screen names) compare by type first
+                    for key, n in sorted(surfaces[a].items(),
+                                         key=lambda kv: [(v is None, type(v).__name__, v) for v in kv[0]]):
+                        cl.evidence.append(Evidence(a, *key), n)
+                seen = set()
+                unique = []
+                for a in cl.aliases:
+                    key = _features(a).clean.lower()
+                    if key not in seen:
+                        unique.append(a)
+                        seen.add(key)
+                cl.aliases = unique
+            out[role] = clusters
+        return out
+
+def cluster_shards(
+    shards: Iterable[List[Dict]],
+    sim_threshold: float = 0.88,
+    roles: Iterable[str] = DEFAULT_ROLE_KEYS
+) -> Dict[str, List[Cluster]]:
+    """Cluster ticket shards through one ClusterState each, merged before finalizing."""
+    state = ClusterState(roles)
+    for shard in shards:
+        state.merge(ClusterState.from_tickets(shard, roles))
+    return state.finalize(sim_threshold)
+
 # ---------- Optional: ranking helper ----------
 def rank_clusters_by_confidence(
     clustered: Dict[str, List[Cluster]]
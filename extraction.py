@@ -1,34 +1,169 @@
 import re
+import hashlib
 from inflection import humanize, underscore
 import json
-import spacy
-import ftfy
 from unidecode import unidecode
-from langdetect import detect, DetectorFactory, detect_langs
-DetectorFactory.seed = 0
-import datetime
-# detect_langs detects the most probable langiages and prob.
 
-nlp = spacy.load("en_core_web_sm")
+MODEL_NAME = "en_core_web_sm"
+# we only ever read PERSON entities, so everything but NER is switched off
+# (tok2vec stays on only if the model's ner listens to it)
+NER_PIPES = ("ner",)
+NER_BATCH_SIZE = 256
+# bump whenever clean_tweets / strip_retweet change what they produce, so
+# cached analyses (nercache.py) from the old cleaner are thrown away
+CLEAN_VERSION = 1
 
-##### get the data 
-with open("gg2013.json", "r", encoding="utf-8") as f:
-    tweet_data = json.load(f)
+##### get the data
+DATA_PATH = "gg2013.json"
+READ_CHUNK = 1 << 16  # characters read per chunk while streaming a JSON array
 
+_decoder = json.JSONDecoder()
 
-##### get the list of tweets, tweet_id, and timestamps
-tweets = []
-tweet_id = []
-timestamp = []
 
-for t in tweet_data:
-    tweets.append(t.get("text"))
-    tweet_id.append(t.get("id"))
-    timestamp.append(datetime.datetime.fromtimestamp(t.get("timestamp_ms")/1000))
+def iter_tweets(path=DATA_PATH, chunk_size=READ_CHUNK):
+    """
+    Yield tweet records one at a time from a JSON array or a JSONL file.
+    Only the record being decoded (plus one read chunk) is held in memory.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(chunk_size)
+        while head and not head.strip():
+            head = f.read(chunk_size)
+        stripped = head.lstrip()
+        if not stripped.startswith("["):
+            # JSONL: one record per line
+            rest = head + f.readline()
+            for line in rest.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
 
-#### fixing time stamp
-# raw_time = example["timestamp_ms"]
-# dt = datetime.datetime.fromtimestamp(raw_time/1000.0)
+        buf = stripped[1:]
+        pos = 0
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                record, end = _decoder.raw_decode(buf, pos)
+                # a record counts only once the "," or "]" after it is in the
+                # buffer: a number (or anything) cut by the chunk boundary
+                # still decodes, as its first digits
+                sep = end
+                while sep < len(buf) and buf[sep].isspace():
+                    sep += 1
+                if sep == len(buf) and not eof:
+                    raise json.JSONDecodeError("Unterminated record", buf, sep)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # the record is cut off by the chunk boundary: drop what we
+                # already consumed and read more
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            if sep == len(buf) or buf[sep] not in ",]":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, sep)
+            yield record
+            if buf[sep] == "]":
+                return
+            pos = sep + 1
+
+
+class TweetStream:
+    """
+    Re-iterable view over a tweet file: every iteration re-opens the file and
+    streams it with iter_tweets, so it can be passed anywhere a list of
+    tweets used to go without loading the corpus.
+    """
+    def __init__(self, path=DATA_PATH, chunk_size=READ_CHUNK):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return iter_tweets(self.path, self.chunk_size)
+
+
+def _prune_for_ner(nlp):
+    """Disable every pipeline component NER does not depend on."""
+    keep = set(NER_PIPES)
+    if "tok2vec" in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+        if any(name in listeners for name in NER_PIPES):
+            keep.add("tok2vec")
+    for name in nlp.pipe_names:
+        if name not in keep:
+            nlp.disable_pipe(name)
+    return nlp
+
+
+##### lazily initialised pipeline
+# nothing heavy happens at import: spaCy (and the model) is only imported
+# the first time something actually asks for it
+class Pipeline:
+    """
+    Holds the spaCy model and the tweet corpus, loading each on first use.
+    """
+    def __init__(self, model_name=MODEL_NAME, data_path=DATA_PATH, ner_only=True):
+        self.model_name = model_name
+        self.data_path = data_path
+        self.ner_only = ner_only
+        self._nlp = None
+        self._tweets = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            import spacy
+            nlp = spacy.load(self.model_name)
+            if self.ner_only:
+                _prune_for_ner(nlp)
+            self._nlp = nlp
+        return self._nlp
+
+    @property
+    def tweets(self):
+        if self._tweets is None:
+            self._tweets = TweetStream(self.data_path)
+        return self._tweets
+
+    def is_loaded(self):
+        return self._nlp is not None
+
+    def model_version(self):
+        """"<model name>-<version>", read without loading the model when possible."""
+        if self._nlp is not None:
+            meta = self._nlp.meta
+            return f"{meta['lang']}_{meta['name']}-{meta['version']}"
+        import spacy.util
+        from pathlib import Path
+        if spacy.util.is_package(self.model_name):
+            return f"{self.model_name}-{spacy.util.get_package_version(self.model_name)}"
+        meta = spacy.util.load_meta(Path(self.model_name) / "meta.json")
+        return f"{meta['lang']}_{meta['name']}-{meta['version']}"
+
+
+PIPELINE = Pipeline()
+tweet_data = PIPELINE.tweets
+
+
+def pipeline_version():
+    """Identifies what produced a cleaned text + its entities (for caching)."""
+    return f"{PIPELINE.model_version()}|clean-{CLEAN_VERSION}"
+
+
+def __getattr__(name):
+    # keep `from extraction import nlp` working without loading at import
+    if name == "nlp":
+        return PIPELINE.nlp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def hashtags_usernames(tweet):
@@ -51,6 +186,8 @@ def hashtags_usernames(tweet):
 ##### clean up the tweets before we try to use spacy
 def clean_tweets(tweet):
     # fix text encoding issues (from slides)
+    # ftfy is imported here so that importing this module stays cheap
+    import ftfy
     tweet = ftfy.fix_text(tweet)
     # fixes unicode to ascii (from slides)
     tweet = unidecode(tweet)
@@ -77,6 +214,9 @@ def clean_tweets(tweet):
     tweet = re.sub(' +', ' ', tweet)
 
     # ensure in english
+    # from langdetect import detect, DetectorFactory, detect_langs
+    # DetectorFactory.seed = 0
+    # detect_langs detects the most probable langiages and prob.
     # try:
     #     if detect(tweet) != "en":
     #         return ""
@@ -86,28 +226,97 @@ def clean_tweets(tweet):
     return tweet
 
 
-##### this is the plain text 
-cleaned_tweets = []
-for tweet in tweets:
-    cleaned_tweets.append(clean_tweets(tweet))
+##### retweet / duplicate collapsing
+# "RT @JustJared: ..." chains in front of the retweeted text
+RT_PREFIX_RE = re.compile(r"^(?:\s*RT\s+@\w+\s*:?)+\s*", re.IGNORECASE)
+URL_RE = re.compile(r"http\S+")
+
+
+def strip_retweet(tweet):
+    """Drop any leading "RT @handle:" prefixes, keeping the retweeted text."""
+    return RT_PREFIX_RE.sub("", tweet)
 
 
-# looking at the clean text
-# print(cleaned_tweets)
+def text_key(tweet):
+    """
+    Hash of the RT-stripped text with URLs removed and whitespace collapsed.
+    Tweets with the same key differ at most in those, so they nearly always
+    clean (and NER) to the same thing; not always, since clean_tweets only
+    drops URLs after ftfy and unidecode, which can change text next to one.
+    """
+    norm = " ".join(URL_RE.sub(" ", strip_retweet(tweet)).split())
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def tweet_user(record):
+    user = record.get("user")
+    if isinstance(user, dict):
+        return user.get("screen_name") or user.get("id")
+    return user
+
+
+def collapse_retweets(records):
+    """
+    Group tweet records by text_key. Returns (groups, keys): one group per
+    distinct text, in first-seen order,
+        {"key", "text" (RT-stripped text of the first copy)}
+    and the text_key of every record, in record order.
+    """
+    groups = {}
+    keys = []
+    for t in records:
+        raw = t.get("text") or ""
+        key = text_key(raw)
+        keys.append(key)
+        if key not in groups:
+            groups[key] = {"key": key, "text": strip_retweet(raw)}
+    return list(groups.values()), keys
+
+
+##### streaming versions: consume records / cleaned text lazily
+def iter_clean_tweets(records):
+    for t in records:
+        yield clean_tweets(t.get("text") or "")
+
 
 ##### now we can use nlp for specific functions
-def extract_people(tweet):
-    doc = nlp(tweet)
+def _people_from_doc(doc):
+    return people_from_spans(doc.text, entity_spans(doc))
+
+
+def entity_spans(doc):
+    return [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]
+
+
+def people_from_spans(tweet, spans):
     # we look at nlp entities to get all the people defined
-    people = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+    people = [tweet[start:end] for start, end, label in spans if label == "PERSON"]
     
     # some of the people have possesive "'s" so we can remove that now
     people = [re.sub(r"'s$", "", name) for name in people]
     # return a list of people in the tweet
     return people
 
+
+def extract_people(tweet):
+    return _people_from_doc(PIPELINE.nlp(tweet))
+
+
+def iter_people(cleaned_tweets, batch_size=NER_BATCH_SIZE):
+    """
+    Batched extract_people: runs nlp.pipe over an iterable of cleaned tweets
+    and yields each tweet's list of people, in input order.
+    """
+    for doc in PIPELINE.nlp.pipe(cleaned_tweets, batch_size=batch_size):
+        yield _people_from_doc(doc)
+
+
+def iter_entities(cleaned_tweets, batch_size=NER_BATCH_SIZE):
+    """Like iter_people, but yields every entity as (start_char, end_char, label)."""
+    for doc in PIPELINE.nlp.pipe(cleaned_tweets, batch_size=batch_size):
+        yield entity_spans(doc)
+
 ##### helps test the extract_people works:
-# for clean_tweet in cleaned_tweets:
-#     people = extract_people(clean_tweet)
+# for people in iter_people(iter_clean_tweets(tweet_data)):
 #     if people:
 #         print(people)
@@ -1,14 +1,17 @@
 import typesys
-from extraction import clean_tweets, extract_people, tweet_data
-from Levenshtein import distance as levenshtein_distance
+from extraction import clean_tweets, tweet_data, NER_BATCH_SIZE, PIPELINE
+from extraction import iter_entities, people_from_spans
+from extraction import collapse_retweets, tweet_user
+from tweettime import tweet_ts
+from collections import OrderedDict
+from functools import partial
+import json
 import re
 
 #HYPERPARAMETERS
 MAX_LEVENSHTEIN_DISTANCE = 12  # Balanced tolerance
 WINDOW_SIZE = 60
 
-print("Number of tweets:", len(tweet_data))
-
 AWARD_NAMES =  [
     "Best Motion Picture Drama",
     "Best Motion Picture Musical or Comedy",
@@ -44,29 +47,112 @@ AWARD_NAMES =  [
 ]
 
 
-def find_best_award(window_text, max_distance=MAX_LEVENSHTEIN_DISTANCE):
+MAX_PREFIX_WORDS = 14  # longest window prefix (in words) compared against the award names
+
+
+class AwardMatcher:
     """
-    Given a text window starting with 'Best', find the closest award name.
+    Matches "Best ..." windows against a fixed award list. The lowercase award
+    table is built once, and every prefix of a window (2..14 words) is scored
+    against every award in one vectorised rapidfuzz cdist call instead of a
+    Python loop of Levenshtein calls. best_many scores a whole batch of
+    windows in a single call over their distinct prefixes; ticket
+    extraction goes through it a chunk at a time (prewarm_award_cache).
+
+    With max_distance set, distances are computed with a cutoff (banded, so
+    much cheaper) and anything further away than max_distance is reported as
+    no match.
     """
-    # Clean the window text - remove extra punctuation
-    window_text = re.sub(r'["""]', '', window_text)
-    window_text = re.sub(r'\s+', ' ', window_text).strip()
-    
-    best_match = None
-    best_distance = float('inf')
+    def __init__(self, awards):
+        self.awards = list(awards)
+        self._lower = [a.lower() for a in self.awards]
+        self._cdist = None
+
+    def _scores(self, candidates, max_distance=None):
+        if self._cdist is None:
+            # rapidfuzz (what Levenshtein is built on) is only imported on first use
+            from rapidfuzz.distance import Levenshtein
+            from rapidfuzz.process import cdist
+            self._cdist = partial(cdist, choices=self._lower, scorer=Levenshtein.distance, workers=1)
+        return self._cdist(candidates, score_cutoff=max_distance)
+
+    @staticmethod
+    def prefixes(window_text):
+        """Lowercased 2..MAX_PREFIX_WORDS-word prefixes of an already normalised window."""
+        words = window_text.lower().split()[:MAX_PREFIX_WORDS]
+        out = []
+        prefix = words[0] if words else ""
+        for word in words[1:]:
+            prefix += " " + word
+            out.append(prefix)
+        return out
+
+    def best(self, window_text, max_distance=None):
+        """
+        (award, distance) of the closest award to any prefix of the window;
+        ties go to the shortest prefix, then to the earlier award.
+        (None, inf) if the window has fewer than two words or nothing is
+        within max_distance.
+        """
+        prefixes = self.prefixes(window_text)
+        if not prefixes:
+            return None, float('inf')
+        scores = self._scores(prefixes, max_distance)
+        # row-major argmin = first (prefix, award) pair reaching the minimum
+        flat = int(scores.argmin())
+        dist = int(scores.flat[flat])
+        if max_distance is not None and dist > max_distance:
+            return None, float('inf')
+        return self.awards[flat % len(self.awards)], dist
+
+    def best_many(self, window_texts, max_distance=None):
+        """
+        best() for many windows, scored in a single cdist call over the
+        batch's distinct prefixes (windows share most of theirs).
+        """
+        import numpy as np
+        rows, lengths, distinct = [], [], {}
+        for text in window_texts:
+            # prefixes numbered by first appearance in the batch
+            prefixes = self.prefixes(text)
+            for prefix in prefixes:
+                row = distinct.get(prefix)
+                if row is None:
+                    row = distinct[prefix] = len(distinct)
+                rows.append(row)
+            lengths.append(len(prefixes))
+        out = [(None, float('inf'))] * len(lengths)
+        if not distinct:
+            return out
+
+        scores = self._scores(list(distinct), max_distance)
+        rows = np.asarray(rows, dtype=np.int64)
+        # per prefix: its closest award (the first on ties) and that distance
+        dist, award = scores.min(axis=1)[rows], scores.argmin(axis=1)[rows]
+        lengths = np.asarray(lengths, dtype=np.int64)
+        has = np.flatnonzero(lengths)
+        starts = (np.cumsum(lengths) - lengths)[has]
+        # per window: the minimum, reached first by its shortest such prefix
+        best = np.minimum.reduceat(dist, starts)
+        at = np.where(dist == np.repeat(best, lengths[has]), np.arange(len(dist)), len(dist))
+        first = np.minimum.reduceat(at, starts)
+        for i, d, a in zip(has.tolist(), best.tolist(), award[first].tolist()):
+            if max_distance is None or d <= max_distance:
+                out[i] = (self.awards[a], int(d))
+        return out
+
+
+AWARD_MATCHER = AwardMatcher(AWARD_NAMES)
+
+
+def _normalize_window(window_text):
+    # Clean the window text - remove extra punctuation, collapse whitespace
+    return " ".join(window_text.replace('"', '').split())
+
+
+def _accept_award(window_text, best_match, best_distance, max_distance):
     words = window_text.split()
-    
-    # Try windows of different sizes
-    for end in range(2, min(15, len(words)+1)):
-        candidate = " ".join(words[:end])
-        
-        # Find closest AWARD_NAME using Levenshtein distance
-        for award in AWARD_NAMES:
-            dist = levenshtein_distance(award.lower(), candidate.lower())
-            if dist < best_distance:
-                best_distance = dist
-                best_match = award
-    
+
     # Penalize "Best Song" matches - require tighter distance
     if best_match == "Best Song Motion Picture" and best_distance > 5:
         return None
@@ -76,16 +162,299 @@ def find_best_award(window_text, max_distance=MAX_LEVENSHTEIN_DISTANCE):
         return best_match
     return None
 
-def extract_category_and_nomination(name, text):
+
+##### memoised award resolution
+# the same "Best ..." phrases recur across thousands of retweets, so results
+# are kept in a bounded LRU keyed on the normalised window text
+AWARD_CACHE_SIZE = 50_000
+AWARD_CACHE_VERSION = 1
+_MISSING = object()
+
+
+class AwardCache:
     """
-    Return (category, nomination) for a given person and tweet text.
-    Uses windowed best-phrase extraction + Levenshtein distance.
+    Bounded LRU map (normalised window, max_distance) -> find_best_award
+    result, with hit/miss/eviction counters. save()/load() write it to a JSON
+    file so worker processes (or the next run) can start warm; a file saved
+    for a different AWARD_NAMES list is ignored.
     """
-    lower_text = text.lower()
-    winner_kw = re.compile(r"\b(won|wins|is the winner|takes|takes home|goes to|receives|awarded)\b", re.IGNORECASE)
-    nominee_kw = re.compile(r"\b(nominated|nominee|up for|shortlisted)\b", re.IGNORECASE)
-    presenter_kw = re.compile(r"\b(presents|presenting|hosted|host|hosts)\b", re.IGNORECASE)
+    def __init__(self, maxsize=AWARD_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # membership test only: does not count as a hit/miss or touch recency
+        return key in self._data
+
+    def get(self, key, default=None):
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._evict()
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        self._evict()
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    @staticmethod
+    def _fingerprint():
+        return [AWARD_CACHE_VERSION, AWARD_NAMES]
+
+    def save(self, path):
+        entries = [[window, dist, award] for (window, dist), award in self._data.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self._fingerprint(), "entries": entries}, f)
+
+    def load(self, path):
+        """Warm the cache from a saved file; returns the number of entries loaded."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if saved.get("fingerprint") != self._fingerprint():
+            return 0
+        entries = saved.get("entries", [])
+        for window, dist, award in entries:
+            self.put((window, dist), award)
+        return len(entries)
+
+
+AWARD_CACHE = AwardCache()
+
+
+def find_best_award(window_text, max_distance=MAX_LEVENSHTEIN_DISTANCE):
+    """
+    Given a text window starting with 'Best', find the closest award name.
+    """
+    window_text = _normalize_window(window_text)
+    key = (window_text, max_distance)
+    award = AWARD_CACHE.get(key, _MISSING)
+    if award is not _MISSING:
+        return award
+
+    # Try windows of different sizes against every award (see AwardMatcher);
+    # anything past max_distance is rejected below anyway
+    best_match, best_distance = AWARD_MATCHER.best(window_text, max_distance)
+    award = _accept_award(window_text, best_match, best_distance, max_distance)
+    AWARD_CACHE.put(key, award)
+    return award
+
+
+def prewarm_award_cache(window_texts, max_distance=MAX_LEVENSHTEIN_DISTANCE):
+    """
+    Resolve every window not cached yet with one batched AwardMatcher call.
+    Each window resolved here counts as a cache miss (find_best_award would
+    have missed on it), so the find_best_award lookups that follow are hits.
+    """
+    todo = {}
+    for w in window_texts:
+        w = _normalize_window(w)
+        if (w, max_distance) not in AWARD_CACHE:
+            todo[w] = None
+    todo = list(todo)
+    for w, (best_match, best_distance) in zip(todo, AWARD_MATCHER.best_many(todo, max_distance)):
+        AWARD_CACHE.put((w, max_distance), _accept_award(w, best_match, best_distance, max_distance))
+    AWARD_CACHE.misses += len(todo)
+    return len(todo)
+
+
+# keyword vocabularies (every term starts and ends with a letter, which
+# TweetMatcher relies on when it checks word boundaries)
+WINNER_TERMS = ("won", "wins", "is the winner", "takes", "takes home", "goes to", "receives", "awarded")
+NOMINEE_TERMS = ("nominated", "nominee", "up for", "shortlisted")
+PRESENTER_TERMS = ("presents", "presenting", "hosted", "host", "hosts")
+
+
+def _kw_re(terms):
+    return re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\b", re.IGNORECASE)
+
+
+winner_kw = _kw_re(WINNER_TERMS)
+nominee_kw = _kw_re(NOMINEE_TERMS)
+presenter_kw = _kw_re(PRESENTER_TERMS)
+BEST_PHRASE_RE = re.compile(r"[Bb]est [A-Za-z0-9 &'()-]{2,80}")
+BEST_START_RE = re.compile(r"[Bb]est ")
+BEST_TAIL_RE = re.compile(r"[A-Za-z0-9 &'()-]*")
+
+
+def _is_word(ch):
+    # what \w matches in a str pattern
+    return ch.isalnum() or ch == "_"
+
+
+class TweetMatcher:
+    """
+    Finds (category, nomination) for any number of names in one tweet.
+
+    The text is lowercased once, keyword and "Best ..." occurrences are
+    located once for the whole tweet, and each window around a name mention
+    is resolved once no matter how many names share it. Output is exactly
+    what the per-name regex scan in extract_category_and_nomination used to
+    give: a keyword counts in a window iff it would match \b...\b inside that
+    window's substring, and the "Best ..." phrase is the first one the
+    window-local regex would have found.
+
+    Non-ASCII text (lowercasing could shift offsets) falls back to the
+    original per-name regex scan.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self._names = {}
+        self._windows = {}
+        self._fast = text.isascii()
+        # keyword / "Best" occurrences, located on the first window lookup
+        self._kw = None
+        self._best = None
+
+    def _scan(self):
+        self._kw = [self._occurrences(terms) for terms in (WINNER_TERMS, NOMINEE_TERMS, PRESENTER_TERMS)]
+        self._best = [(m.start(), BEST_TAIL_RE.match(self.text, m.end()).end() - m.end())
+                      for m in BEST_START_RE.finditer(self.text)]
+
+    def _occurrences(self, terms):
+        """(start, end, boundary before, boundary after) for every occurrence of every term."""
+        lower, n = self.lower, len(self.lower)
+        out = []
+        for term in terms:
+            pos = lower.find(term)
+            while pos != -1:
+                end = pos + len(term)
+                out.append((pos, end,
+                            pos == 0 or not _is_word(lower[pos - 1]),
+                            end == n or not _is_word(lower[end])))
+                pos = lower.find(term, pos + 1)
+        return out
+
+    @staticmethod
+    def _kw_in(occurrences, ws, we):
+        # the window edges count as boundaries, exactly like searching the substring
+        for start, end, before, after in occurrences:
+            if ws <= start and end <= we and (before or start == ws) and (after or end == we):
+                return True
+        return False
+
+    def _best_phrase(self, ws, we):
+        # first "[Bb]est " in the window with at least 2 phrase chars after it
+        for start, tail in self._best:
+            if start < ws:
+                continue
+            head = start + 5
+            if head > we:
+                break
+            take = min(tail, 80, we - head)
+            if take >= 2:
+                return self.text[start:head + take]
+        return None
+
+    def _window(self, ws, we):
+        key = (ws, we)
+        if key in self._windows:
+            return self._windows[key]
+        if self._kw is None:
+            self._scan()
+
+        phrase = self._best_phrase(ws, we)
+        nomination = find_best_award(phrase) if phrase else None
+
+        result = None
+        # Check for winner keywords
+        if nomination and self._kw_in(self._kw[0], ws, we):
+            result = ("winner", nomination)
+        elif nomination and self._kw_in(self._kw[1], ws, we):
+            result = ("nominee", nomination)
+        elif self._kw_in(self._kw[2], ws, we):
+            result = ("presenter", nomination)
+        # Default to winner if we found a nomination (since most tweets announce winners)
+        elif nomination:
+            result = ("winner", nomination)
+        self._windows[key] = result
+        return result
 
+    def phrases(self, names):
+        """
+        The "Best ..." phrases category() may resolve for names (every
+        mention window's, first mention first), so a batch of tweets can
+        resolve them all at once with prewarm_award_cache. Non-ASCII text
+        (the regex fallback) yields nothing; its lookups just miss the cache.
+        """
+        if not self._fast:
+            return
+        for name in names:
+            if not name or name in self._names:
+                continue
+            for start, end in self._mentions(name.lower()):
+                if self._kw is None:
+                    self._scan()
+                phrase = self._best_phrase(max(0, start - WINDOW_SIZE), min(len(self.lower), end + WINDOW_SIZE))
+                if phrase:
+                    yield phrase
+
+    def _mentions(self, name_lower):
+        """(start, end) of \bname\b matches, as re.finditer would report them."""
+        lower, n, size = self.lower, len(self.lower), len(name_lower)
+        first_word, last_word = _is_word(name_lower[0]), _is_word(name_lower[-1])
+        pos = lower.find(name_lower)
+        while pos != -1:
+            end = pos + size
+            before = _is_word(lower[pos - 1]) if pos > 0 else False
+            after = _is_word(lower[end]) if end < n else False
+            if before != first_word and after != last_word:
+                yield pos, end
+                pos = lower.find(name_lower, end)
+            else:
+                pos = lower.find(name_lower, pos + 1)
+
+    def category(self, name):
+        """(category, nomination) for name, or (None, None)."""
+        if name not in self._names:
+            if self._fast and name:
+                self._names[name] = self._category_fast(name)
+            else:
+                self._names[name] = _category_by_regex(name, self.text, self.lower)
+        return self._names[name]
+
+    def _category_fast(self, name):
+        # Search for the name in the text
+        for start, end in self._mentions(name.lower()):
+            win_start = max(0, start - WINDOW_SIZE)
+            win_end = min(len(self.lower), end + WINDOW_SIZE)
+            result = self._window(win_start, win_end)
+            if result is not None:
+                return result
+        return None, None
+
+
+def _category_by_regex(name, text, lower_text):
     try:
         name_re = re.compile(r"\b" + re.escape(name.lower()) + r"\b")
     except re.error:
@@ -100,7 +469,7 @@ def extract_category_and_nomination(name, text):
         window_orig = text[win_start:win_end]
 
         # Find any phrase starting with 'Best' (case insensitive) within this window
-        best_match = re.search(r"[Bb]est [A-Za-z0-9 &'()-]{2,80}", window_orig)
+        best_match = BEST_PHRASE_RE.search(window_orig)
         nomination = find_best_award(best_match.group(0)) if best_match else None
 
         # Check for winner keywords
@@ -118,27 +487,333 @@ def extract_category_and_nomination(name, text):
     return None, None
 
 
-from tqdm import tqdm
-def get_tickets(tweet_data):
-    tickets = []
+def extract_category_and_nomination(name, text):
+    """
+    Return (category, nomination) for a given person and tweet text.
+    Uses windowed best-phrase extraction + Levenshtein distance.
+    To look up several names in the same tweet, share one TweetMatcher.
+    """
+    return TweetMatcher(text).category(name)
+
+
+from collections import deque
+from itertools import islice
+import sys
+import time
+from unidecode import unidecode
+from sinks import ListSink, load_checkpoint, save_checkpoint
+
+TICKET_CHUNK_SIZE = 500  # tweets handed to a worker at a time
+KNOWN_TEXTS_SIZE = 100_000  # distinct texts whose tickets iter_ticket_chunks keeps for later chunks (LRU)
+
+# A tweet only yields a ticket if some name gets a category or a nomination.
+# Nominations need a "Best ..." phrase and the only category that can come
+# without one is presenter, so a raw text that mentions neither "best" nor a
+# presenter_kw stem can be skipped before cleaning/NER. winner_kw and
+# nominee_kw only count next to a nomination, so they are implied by "best".
+# Matching is case-insensitive and unanchored so hashtags (#BestActor) pass.
+PREFILTER_TERMS = ("best", "present", "host")
+
+
+class Prefilter:
+    """
+    Cheap single-regex gate over raw tweet text, counting how many tweets it
+    sees and lets through.
+    """
+    def __init__(self, terms=PREFILTER_TERMS):
+        self.pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+        self.seen = 0
+        self.passed = 0
+
+    def __call__(self, text):
+        self.seen += 1
+        hit = self.pattern.search(text) is not None
+        if not hit and not text.isascii():
+            # clean_tweets transliterates, which can turn e.g. fullwidth
+            # letters into a match
+            hit = self.pattern.search(unidecode(text)) is not None
+        if hit:
+            self.passed += 1
+        return hit
+
+    def selectivity(self):
+        """Fraction of tweets let through (0.0 when nothing was seen)."""
+        return self.passed / self.seen if self.seen else 0.0
+
+    def stats(self):
+        return {"seen": self.seen, "passed": self.passed, "skipped": self.seen - self.passed,
+                "selectivity": self.selectivity()}
+
+
+def _make_ticket(cleaned, people, matcher=None):
+    ticket = {"names-cat": [], "confidence": 0}
+    if matcher is None:
+        matcher = TweetMatcher(cleaned)
+
+    for name in people:
+        cat, nomination = matcher.category(name)
+        ticket["names-cat"].append((name, cat, nomination))
+        if cat is not None:
+            ticket["confidence"] += 1
+        if nomination is not None:
+            ticket["confidence"] += 1
+
+    return ticket
+
+
+def _tickets_for_chunk(items, batch_size=NER_BATCH_SIZE):
+    """
+    clean + NER + category extraction for one chunk of (raw text, cached)
+    pairs, where cached is a (cleaned, spans) analysis from NERCache or None.
+    Texts without an analysis are cleaned and NER'd here.
+
+    Returns (ticket, fresh) per item in input order: one ticket per text
+    (including empty ones), and the new (cleaned, spans) analysis, or None if
+    it came from the cache. Every "Best ..." phrase the chunk's names look
+    up is resolved in one batched AwardMatcher call (prewarm_award_cache)
+    before the tickets are made.
+    """
+    todo = [i for i, (_, cached) in enumerate(items) if cached is None]
+    analyses = [cached for _, cached in items]
+    cleaned = [clean_tweets(items[i][0]) for i in todo]
+    for i, text, spans in zip(todo, cleaned, iter_entities(cleaned, batch_size=batch_size)):
+        analyses[i] = (text, spans)
+
+    people = [people_from_spans(text, spans) for text, spans in analyses]
+    matchers = [TweetMatcher(text) for text, _ in analyses]
+    prewarm_award_cache(phrase for m, names in zip(matchers, people) for phrase in m.phrases(names))
+
+    fresh = set(todo)
+    return [(_make_ticket(text, names, m), (text, spans) if i in fresh else None)
+            for i, ((text, spans), names, m) in enumerate(zip(analyses, people, matchers))]
+
+
+def _init_worker(model_name, award_cache_path=None, award_cache_size=AWARD_CACHE_SIZE):
+    # load the spaCy model once per worker process, not once per chunk
+    PIPELINE.model_name = model_name
+    PIPELINE.nlp
+    AWARD_CACHE.resize(award_cache_size)
+    if award_cache_path:
+        AWARD_CACHE.load(award_cache_path)
+
+
+def _chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
 
-    for tweet in tqdm(tweet_data[:5000]):
-        cleaned = clean_tweets(tweet.get("text", ""))
-        people = extract_people(cleaned)  # names only
 
-        ticket = {"names-cat": [], "confidence": 0}
+def _map_chunks(func, jobs, workers=1, initargs=None):
+    """
+    For every (context, chunk) in jobs yield (context, func(chunk)), in input
+    order. With workers > 1 the chunks are spread over a process pool
+    (initialised with _init_worker(*initargs)); at most 2 * workers chunks are
+    in flight so a long stream is never materialised.
+    """
+    if workers <= 1:
+        for context, chunk in jobs:
+            yield context, func(chunk)
+        return
+
+    import multiprocessing
+    if initargs is None:
+        initargs = (PIPELINE.model_name,)
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for context, chunk in jobs:
+            pending.append((context, pool.apply_async(func, (chunk,))))
+            if len(pending) >= 2 * workers:
+                done, res = pending.popleft()
+                yield done, res.get()
+        while pending:
+            done, res = pending.popleft()
+            yield done, res.get()
+
+
+def _dedup_jobs(records, chunk_size, known, cache=None, prefilter=None):
+    """
+    Drop the records the prefilter rules out, collapse the rest of each chunk
+    into distinct texts (see collapse_retweets) and keep only the texts whose
+    key is not in known (an LRU of key -> ticket), paired with their cached
+    analysis when a NERCache is given. The tickets of the known texts are
+    taken along, so evicting them from known later does not matter.
+    Yields ((chunk length, kept records, their keys, new_groups, {key: ticket}),
+    [(text, cached), ...]) jobs for _map_chunks.
+    """
+    for chunk in _chunked(records, chunk_size):
+        kept = chunk if prefilter is None else [t for t in chunk if prefilter(t.get("text") or "")]
+        groups, keys = collapse_retweets(kept)
+        new, reused = [], {}
+        for g in groups:
+            if g["key"] in known:
+                known.move_to_end(g["key"])
+                reused[g["key"]] = known[g["key"]]
+            else:
+                new.append(g)
+        texts = [g["text"] for g in new]
+        cached = cache.get_many([g["key"] for g in new]) if cache is not None else [None] * len(texts)
+        yield (len(chunk), kept, keys, new, reused), list(zip(texts, cached))
+
+
+def iter_ticket_chunks(tweet_data, batch_size=NER_BATCH_SIZE, workers=1, chunk_size=TICKET_CHUNK_SIZE, cache=None,
+                       prefilter=True, award_cache=None):
+    """
+    Stream tickets from any iterable of tweet records (a list, a TweetStream
+    or a generator from iter_tweets), one chunk at a time: yields
+    (tweets read, tickets for those tweets) per chunk of chunk_size tweets.
+    NER runs in batches of batch_size.
+
+    Retweets and exact copies are collapsed first (extraction.text_key), so
+    the expensive stages run once per distinct text; the result is then fanned
+    back out to one ticket per tweet, carrying that tweet's "id", "user" and
+    "ts" (tweettime.tweet_ts) and the shared "text_hash" so echo counts
+    survive.
+
+    With workers > 1 the distinct texts are sharded into chunks across that
+    many processes; results are merged back in tweet order, so the output is
+    the same as the serial run.
+
+    Tickets of the last KNOWN_TEXTS_SIZE distinct texts are reused by later
+    chunks; older texts go through cache (or the pipeline) again.
+
+    cache is an optional nercache.NERCache: texts it already knows skip
+    cleaning and NER, and new analyses are written back to it.
+
+    prefilter (True for a fresh Prefilter, or a Prefilter to read its counts
+    afterwards, or False to disable) drops tweets that cannot produce a
+    ticket before anything expensive runs; it never changes the output.
+
+    award_cache is an optional path for the AWARD_CACHE of resolved "Best ..."
+    phrases: it is loaded before the run (by every worker too) and saved
+    after it. Workers start warm from the file but what they resolve stays in
+    the worker, so the saved file only grows in serial runs.
+    """
+    if prefilter is True:
+        prefilter = Prefilter()
+    elif not prefilter:
+        prefilter = None
+    # text_key -> ticket for that text (None when it produced nothing), for the last KNOWN_TEXTS_SIZE texts
+    known = OrderedDict()
+
+    work = partial(_tickets_for_chunk, batch_size=batch_size)
+    if award_cache:
+        AWARD_CACHE.load(award_cache)
+    initargs = (PIPELINE.model_name, award_cache, AWARD_CACHE.maxsize)
+
+    jobs = _dedup_jobs(tweet_data, chunk_size, known, cache, prefilter)
+    for (n_read, chunk, keys, new, tickets_of), results in _map_chunks(work, jobs, workers, initargs):
+        for g, (ticket, _) in zip(new, results):
+            tickets_of[g["key"]] = known[g["key"]] = ticket if ticket["confidence"] > 0 else None  # Changed from > 1 to > 0
+            known.move_to_end(g["key"])
+        while len(known) > KNOWN_TEXTS_SIZE:
+            known.popitem(last=False)
+        if cache is not None:
+            fresh = [(g["key"], analysis) for g, (_, analysis) in zip(new, results) if analysis is not None]
+            if fresh:
+                cache.put_many(*zip(*fresh))
+        # fan out to every copy, in tweet order
+        tickets = []
+        for tweet, key in zip(chunk, keys):
+            ticket = tickets_of[key]
+            if ticket is not None:
+                tickets.append({"names-cat": list(ticket["names-cat"]), "confidence": ticket["confidence"],
+                                "id": tweet.get("id"), "user": tweet_user(tweet), "ts": tweet_ts(tweet),
+                                "text_hash": key})
+        yield n_read, tickets
 
-        for name in people:
-            cat, nomination = extract_category_and_nomination(name, cleaned)
-            ticket["names-cat"].append((name, cat, nomination))
-            if cat is not None:
-                ticket["confidence"] += 1
-            if nomination is not None:
-                ticket["confidence"] += 1
+    if award_cache:
+        AWARD_CACHE.save(award_cache)
 
-        if ticket["confidence"] > 0:  # Changed from > 1 to > 0
-            tickets.append(ticket)
 
-    return tickets
+class Throughput:
+    """Running tweets/s and tickets/s, printed every `every` seconds."""
+    def __init__(self, every=10.0, out=None):
+        self.every = every
+        self.out = out if out is not None else sys.stderr
+        self.start = self._last = time.perf_counter()
+        self.tweets = 0
+        self.tickets = 0
+
+    def update(self, tweets, tickets):
+        self.tweets += tweets
+        self.tickets += tickets
+        now = time.perf_counter()
+        if self.every is not None and now - self._last >= self.every:
+            self._last = now
+            self.report()
+
+    def rates(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return self.tweets / elapsed, self.tickets / elapsed
+
+    def report(self, prefix=""):
+        tweets_s, tickets_s = self.rates()
+        print(f"{prefix}{self.tweets} tweets ({tweets_s:.0f}/s), {self.tickets} tickets ({tickets_s:.0f}/s)",
+              file=self.out)
+
+
+def run_tickets(tweet_data, sink, checkpoint=None, checkpoint_every=20, limit=None, report_every=10.0, **kwargs):
+    """
+    Stream tickets for tweet_data into sink (sinks.ListSink, JsonlSink or
+    ShardedJsonlSink) and return the sink.
+
+    Every checkpoint_every chunks the sink is flushed and the checkpoint file
+    records how many tweets have been fully processed. If the checkpoint
+    already exists the run resumes from there: the tweets before that
+    offset are skipped and whatever the sink received after the checkpoint
+    is discarded, so an interrupted run finishes with the same output. A
+    finished run leaves its checkpoint marked done; delete it to start over.
+    A checkpoint needs a file sink: a ListSink is rejected, as it cannot
+    hold the tickets from before the offset.
+
+    limit caps how many tweets (counted from the start of tweet_data) are
+    read; None means all of them. Throughput is printed every report_every
+    seconds (None for quiet). Other keyword arguments go to
+    iter_ticket_chunks.
+    """
+    if checkpoint and isinstance(sink, ListSink):
+        # a fresh ListSink holds none of the tickets from before the checkpoint
+        raise ValueError("checkpoint needs a file sink (JsonlSink or ShardedJsonlSink), not a ListSink")
+    state = load_checkpoint(checkpoint) if checkpoint else None
+    offset = state["offset"] if state else 0
+    sink.start(state["sink"] if state else None)
+    if state and state.get("done"):
+        sink.close()
+        return sink
+
+    meter = Throughput(report_every)
+    records = islice(tweet_data, offset, limit)
+
+    def _checkpoint(done=False):
+        sink.flush()
+        if checkpoint:
+            save_checkpoint(checkpoint, {"offset": offset, "sink": sink.state(), "done": done})
+
+    try:
+        for n, (n_read, tickets) in enumerate(iter_ticket_chunks(records, **kwargs), 1):
+            sink.write(tickets)
+            offset += n_read
+            meter.update(n_read, len(tickets))
+            if n % checkpoint_every == 0:
+                _checkpoint()
+        _checkpoint(done=True)
+    finally:
+        sink.close()
+    if report_every is not None:
+        meter.report("done: ")
+    return sink
+
+
+def get_tickets(tweet_data, limit=None, report_every=None, **kwargs):
+    """
+    Build the full list of tickets in memory (see iter_ticket_chunks for the
+    keyword arguments). Use run_tickets with a file sink for large corpora.
+    """
+    return run_tickets(tweet_data, ListSink(), limit=limit, report_every=report_every, **kwargs).tickets
+
 
-print(get_tickets(tweet_data))
\ No newline at end of file
+if __name__ == "__main__":
+    print(get_tickets(tweet_data))
\ No newline at end of file
@@ -0,0 +1,92 @@
+# nercache.py
+# Persistent cache of the expensive per-tweet work (clean_tweets + spaCy NER),
+# so reruns after tweaking frame.py / cluster.py heuristics skip NER entirely.
+import hashlib
+import json
+import os
+import sqlite3
+
+CACHE_PATH = "ner_cache.sqlite"
+SQL_BATCH = 500  # keys per SELECT (sqlite caps bound parameters)
+
+
+class NERCache:
+    """
+    SQLite-backed map from (tweet text, pipeline version) to
+    (cleaned text, entity spans), where spans are (start_char, end_char, label).
+    Any string that determines the cleaned text can stand in for the tweet
+    text; frame.get_tickets uses extraction.text_key, so every retweet of a
+    text shares one entry.
+
+    The pipeline version (extraction.pipeline_version(): spaCy model name and
+    version plus CLEAN_VERSION) is part of every key and is recorded in the
+    file; opening the cache with a different version drops the stale rows.
+    """
+    def __init__(self, path=CACHE_PATH, version=None):
+        if version is None:
+            from extraction import pipeline_version
+            version = pipeline_version()
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses (key BLOB PRIMARY KEY, cleaned TEXT, spans TEXT)"
+        )
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != version:
+            self.invalidate()
+
+    def _key(self, text):
+        # hash of pipeline version + text
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.version.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def get_many(self, texts):
+        """Return [(cleaned, spans) or None] for texts, in order."""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        for i in range(0, len(keys), SQL_BATCH):
+            batch = keys[i:i + SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            for key, cleaned, spans in self._db.execute(
+                f"SELECT key, cleaned, spans FROM analyses WHERE key IN ({marks})", batch
+            ):
+                found[key] = (cleaned, [tuple(s) for s in json.loads(spans)])
+        out = [found.get(k) for k in keys]
+        hit = sum(1 for r in out if r is not None)
+        self.hits += hit
+        self.misses += len(out) - hit
+        return out
+
+    def put_many(self, texts, results):
+        """Store (cleaned, spans) results for texts."""
+        rows = [(self._key(t), cleaned, json.dumps(spans))
+                for t, (cleaned, spans) in zip(texts, results)]
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?)", rows)
+
+    def invalidate(self):
+        """Drop every cached analysis and stamp the file with the current version."""
+        with self._db:
+            self._db.execute("DELETE FROM analyses")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+
+    def size(self):
+        """{"entries": rows stored, "bytes": size of the file on disk}."""
+        n = self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {"entries": n, "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
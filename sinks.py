@@ -0,0 +1,162 @@
+# sinks.py
+# Where streamed tickets go (memory, one JSONL file, or a set of JSONL
+# shards), plus the checkpoint file frame.run_tickets resumes from.
+import glob
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+
+class ListSink:
+    """Keeps tickets in memory, in .tickets."""
+    def __init__(self):
+        self.tickets = []
+
+    def start(self, state=None):
+        # on resume, forget anything written after the checkpoint
+        del self.tickets[(state or {}).get("count", 0):]
+
+    def write(self, tickets):
+        self.tickets.extend(tickets)
+
+    def flush(self):
+        pass
+
+    def state(self):
+        return {"count": len(self.tickets)}
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """Appends tickets to one JSONL file, one ticket per line."""
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self.count = 0
+
+    def start(self, state=None):
+        if state is None:
+            self._f = open(self.path, "w", encoding="utf-8")
+            self.count = 0
+            return
+        # drop whatever was written after the checkpoint, then append
+        self._f = open(self.path, "a+", encoding="utf-8")
+        self._f.truncate(state["bytes"])
+        self._f.seek(state["bytes"])
+        self.count = state["count"]
+
+    def write(self, tickets):
+        for t in tickets:
+            self._f.write(json.dumps(t))
+            self._f.write("\n")
+        self.count += len(tickets)
+
+    def flush(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def state(self):
+        return {"count": self.count, "bytes": self._f.tell()}
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class ShardedJsonlSink:
+    """
+    Writes tickets to <directory>/<prefix>-00000.jsonl, -00001.jsonl, ...
+    starting a new shard every shard_size tickets.
+    """
+    def __init__(self, directory, shard_size=100_000, prefix="tickets"):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.shard = 0
+        self.in_shard = 0
+        self.count = 0
+        self._f = None
+
+    def _path(self, shard):
+        return os.path.join(self.directory, f"{self.prefix}-{shard:05d}.jsonl")
+
+    def _shards(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}-*.jsonl")))
+
+    def start(self, state=None):
+        os.makedirs(self.directory, exist_ok=True)
+        if state is None:
+            for path in self._shards():
+                os.remove(path)
+            self.shard, self.in_shard, self.count = 0, 0, 0
+            self._f = open(self._path(0), "w", encoding="utf-8")
+            return
+        self.shard, self.in_shard, self.count = state["shard"], state["in_shard"], state["count"]
+        keep = self._path(self.shard)
+        for path in self._shards():
+            if path > keep:
+                os.remove(path)
+        self._f = open(keep, "a+", encoding="utf-8")
+        self._f.truncate(state["bytes"])
+        self._f.seek(state["bytes"])
+
+    def write(self, tickets):
+        for t in tickets:
+            if self.in_shard >= self.shard_size:
+                self._f.close()
+                self.shard += 1
+                self.in_shard = 0
+                self._f = open(self._path(self.shard), "w", encoding="utf-8")
+            self._f.write(json.dumps(t))
+            self._f.write("\n")
+            self.in_shard += 1
+        self.count += len(tickets)
+
+    def flush(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def state(self):
+        return {"count": self.count, "shard": self.shard, "in_shard": self.in_shard, "bytes": self._f.tell()}
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def load_tickets(path, prefix="tickets"):
+    """Yield tickets back from a JsonlSink file or a ShardedJsonlSink directory."""
+    paths = sorted(glob.glob(os.path.join(path, f"{prefix}-*.jsonl"))) if os.path.isdir(path) else [path]
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+##### checkpoints
+def save_checkpoint(path, state):
+    """Atomically replace the checkpoint file with state."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(state, version=CHECKPOINT_VERSION), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """The saved state, or None if there is no (usable) checkpoint."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
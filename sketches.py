@@ -0,0 +1,154 @@
+# sketches.py
+# Fixed-size summaries of unbounded streams: heavy hitters (Space-Saving),
+# frequency estimates (Count-Min) and distinct counts (HyperLogLog), for
+# aggregation.StreamingAggregator.
+import hashlib
+import heapq
+from array import array
+from itertools import count
+from math import log
+
+
+def hash64(key, seed=0):
+    """Stable 64-bit hash of str(key) (unlike hash(), the same in every process)."""
+    h = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8, salt=seed.to_bytes(8, "little"))
+    return int.from_bytes(h.digest(), "little")
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters of a weighted stream in at most `capacity` counters
+    (Metwally et al.). A new item that finds every counter taken replaces
+    the smallest one and inherits its count as error, so every reported
+    count overestimates the true total by at most its error, and error is
+    at most (total weight) / capacity. Any item whose true total exceeds
+    that is guaranteed to be tracked.
+
+    Each counter also carries a payload made by payload_factory (reset on
+    replacement) for per-item side statistics.
+    """
+    def __init__(self, capacity, payload_factory=None):
+        self.capacity = capacity
+        self.payload_factory = payload_factory
+        self.total = 0.0
+        self._slots = {}  # item -> [count, error, payload]
+        self._heap = []   # (count, tiebreak, item), stale entries dropped lazily
+        self._tiebreak = count()
+
+    def _push(self, item, slot):
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(s[0], next(self._tiebreak), k) for k, s in self._slots.items()]
+            heapq.heapify(self._heap)
+        heapq.heappush(self._heap, (slot[0], next(self._tiebreak), item))
+
+    def _pop_smallest(self):
+        while True:
+            c, _, item = heapq.heappop(self._heap)
+            slot = self._slots.get(item)
+            if slot is not None and slot[0] == c:
+                del self._slots[item]
+                return c
+
+    def add(self, item, weight=1.0):
+        """Count weight for item; returns the item's payload (None without a payload_factory)."""
+        self.total += weight
+        slot = self._slots.get(item)
+        if slot is None:
+            error = self._pop_smallest() if len(self._slots) >= self.capacity else 0.0
+            payload = self.payload_factory() if self.payload_factory else None
+            slot = self._slots[item] = [error, error, payload]
+        slot[0] += weight
+        self._push(item, slot)
+        return slot[2]
+
+    def adjust(self, item, weight):
+        """
+        Add weight (possibly negative) to item's count if it is tracked,
+        never admitting it; returns the payload, or None if not tracked.
+        """
+        slot = self._slots.get(item)
+        if slot is None:
+            return None
+        self.total += weight
+        slot[0] += weight
+        self._push(item, slot)
+        return slot[2]
+
+    def items(self):
+        """[(item, count, error, payload)], largest count first."""
+        return sorted(((k, c, e, p) for k, (c, e, p) in self._slots.items()), key=lambda r: -r[1])
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, item):
+        return item in self._slots
+
+
+class CountMinSketch:
+    """
+    Frequency estimates in depth x width counters (Cormode & Muthukrishnan).
+    While counts stay non-negative, estimate() never undercounts; it
+    overcounts by at most e/width of the total count with probability
+    1 - exp(-depth), so size width for the stream you expect. Keys can
+    also be given as hash64() values (the *_hash methods) to skip hashing.
+    """
+    def __init__(self, width=1 << 20, depth=4):
+        self.width = width
+        self.depth = depth
+        self._rows = [array("i", bytes(4 * width)) for _ in range(depth)]
+
+    def _columns(self, h):
+        lo, hi = h & 0xFFFFFFFF, h >> 32  # double hashing: column i is lo + i*hi
+        return [(lo + i * hi) % self.width for i in range(self.depth)]
+
+    def add_hash(self, h, count=1):
+        """Count the key hashing to h; returns its estimate before this add."""
+        cols = self._columns(h)
+        before = min(row[c] for row, c in zip(self._rows, cols))
+        for row, c in zip(self._rows, cols):
+            row[c] += count
+        return before
+
+    def estimate_hash(self, h):
+        return min(row[c] for row, c in zip(self._rows, self._columns(h)))
+
+    def add(self, key, count=1):
+        return self.add_hash(hash64(key), count)
+
+    def estimate(self, key):
+        return self.estimate_hash(hash64(key))
+
+
+class HyperLogLog:
+    """
+    Distinct-count estimate in 2^precision one-byte registers (Flajolet et
+    al., with linear counting for small counts); relative error is about
+    1.04 / sqrt(2^precision). Sketches with the same precision merge by
+    register-wise max.
+    """
+    def __init__(self, precision=8):
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, key):
+        h = hash64(key)
+        idx = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self._registers[idx]:
+            self._registers[idx] = rank
+
+    def merge(self, other):
+        """Fold other (same precision) into this sketch."""
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    def count(self):
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return m * log(m / zeros)
+        return estimate
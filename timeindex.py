@@ -0,0 +1,169 @@
+# timeindex.py
+# Time-sorted, array-backed tweet index: an int64 epoch-ms column plus
+# offsets into one UTF-8 text store, so "every tweet from 20:14 to 20:19"
+# is two binary searches instead of a rescan of the corpus.
+import datetime
+import json
+import os
+
+from extraction import tweet_user
+from tweettime import tweet_ts
+
+INDEX_VERSION = 1
+MINUTE_MS = 60_000
+
+
+def to_ms(t):
+    """Epoch milliseconds from an int/float (already ms) or a datetime (naive = local time)."""
+    if isinstance(t, datetime.datetime):
+        return int(t.timestamp() * 1000)
+    return int(t)
+
+
+class _Strings:
+    """Strings packed into one UTF-8 buffer; string i is buf[offsets[i]:offsets[i + 1]]."""
+    def __init__(self, buf, offsets):
+        self.buf = buf
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, strings):
+        import numpy as np
+        raw = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(raw) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in raw], out=offsets[1:])
+        return cls(b"".join(raw), offsets)
+
+    def __getitem__(self, i):
+        return self.buf[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class TweetIndex:
+    """
+    Tweets sorted by time, as columns: ts (int64 epoch ms), ids (int64,
+    -1 when missing), and text and user in _Strings stores. Build it once
+    from any iterable of tweet records (a TweetStream, a list), save() it
+    next to the corpus, and load() it on later runs.
+
+    range(start, end) finds the half-open [start, end) window with
+    np.searchsorted; window(start, end) is a re-iterable view of the
+    records in it that can be passed anywhere tweet_data goes (e.g.
+    frame.get_tickets). histogram() gives per-minute (or per-bin) volumes.
+    Records without a usable timestamp (tweet_ts) are left out and counted
+    in .untimed.
+    """
+    def __init__(self, ts, ids, texts, users, untimed=0):
+        self.ts = ts
+        self.ids = ids
+        self.texts = texts
+        self.users = users
+        self.untimed = untimed
+
+    @classmethod
+    def build(cls, tweets):
+        import numpy as np
+        ts, ids, texts, users = [], [], [], []
+        untimed = 0
+        for t in tweets:
+            when = tweet_ts(t)
+            if when is None:
+                untimed += 1
+                continue
+            ts.append(when)
+            tid = t.get("id")
+            ids.append(tid if isinstance(tid, int) else -1)
+            texts.append(t.get("text") or "")
+            user = tweet_user(t)
+            users.append("" if user is None else str(user))
+        ts = np.asarray(ts, dtype=np.int64)
+        order = np.argsort(ts, kind="stable")  # ties keep corpus order
+        return cls(ts[order], np.asarray(ids, dtype=np.int64)[order],
+                   _Strings.pack([texts[i] for i in order.tolist()]),
+                   _Strings.pack([users[i] for i in order.tolist()]), untimed)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def record(self, i):
+        """Tweet i (in time order) as a record like iter_tweets yields."""
+        tid = int(self.ids[i])
+        return {"text": self.texts[i], "user": {"screen_name": self.users[i]},
+                "id": tid if tid >= 0 else None, "timestamp_ms": int(self.ts[i])}
+
+    def range(self, start=None, end=None):
+        """(lo, hi): the positions of the tweets with start <= ts < end (None = unbounded)."""
+        import numpy as np
+        lo = 0 if start is None else int(np.searchsorted(self.ts, to_ms(start), side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.ts, to_ms(end), side="left"))
+        return lo, max(lo, hi)
+
+    def window(self, start=None, end=None):
+        """Re-iterable view of the records with start <= ts < end."""
+        return TweetWindow(self, *self.range(start, end))
+
+    def count(self, start=None, end=None):
+        lo, hi = self.range(start, end)
+        return hi - lo
+
+    def histogram(self, bin_ms=MINUTE_MS, start=None, end=None):
+        """
+        (bin starts, counts), int64 arrays: tweets per bin_ms bin from the
+        bin holding start (default: the first tweet) up to end. Bins are
+        aligned to multiples of bin_ms since the epoch, so one minute's
+        count is the same whatever window is asked for.
+        """
+        import numpy as np
+        lo, hi = self.range(start, end)
+        ts = self.ts[lo:hi]
+        if start is None and not len(ts):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first = (to_ms(start) if start is not None else int(ts[0])) // bin_ms
+        if end is not None:
+            last = (to_ms(end) - 1) // bin_ms
+        else:
+            last = int(ts[-1]) // bin_ms if len(ts) else first
+        counts = np.bincount(ts // bin_ms - first, minlength=max(last - first + 1, 0))
+        return np.arange(first, first + len(counts), dtype=np.int64) * bin_ms, counts
+
+    ##### persistence
+    def save(self, path):
+        """Write the index to a .npz file (atomically)."""
+        import numpy as np
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, ts=self.ts, ids=self.ids,
+                 text_buf=np.frombuffer(self.texts.buf, dtype=np.uint8), text_offsets=self.texts.offsets,
+                 user_buf=np.frombuffer(self.users.buf, dtype=np.uint8), user_offsets=self.users.offsets,
+                 meta=np.array(json.dumps({"version": INDEX_VERSION, "untimed": self.untimed})))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """The index saved at path, or None if there is no (usable) index there."""
+        import numpy as np
+        try:
+            with np.load(path) as f:
+                meta = json.loads(str(f["meta"]))
+                if meta.get("version") != INDEX_VERSION:
+                    return None
+                return cls(f["ts"], f["ids"], _Strings(f["text_buf"].tobytes(), f["text_offsets"]),
+                           _Strings(f["user_buf"].tobytes(), f["user_offsets"]), meta["untimed"])
+        except FileNotFoundError:
+            return None
+
+
+class TweetWindow:
+    """Records lo..hi-1 of a TweetIndex; every iteration starts over, like TweetStream."""
+    def __init__(self, index, lo, hi):
+        self.index = index
+        self.lo = lo
+        self.hi = hi
+
+    def __iter__(self):
+        record = self.index.record
+        return (record(i) for i in range(self.lo, self.hi))
+
+    def __len__(self):
+        return self.hi - self.lo
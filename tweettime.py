@@ -0,0 +1,25 @@
+# tweettime.py
+# When was a tweet posted? Its timestamp_ms, or the creation time packed
+# into its snowflake id. Shared by extraction (ticket "ts") and aggregation
+# (hit times) without either importing the other.
+
+TWITTER_EPOCH_MS = 1288834974657  # snowflake ids carry (ms since this) << 22
+FIRST_TWEET_MS = 1142899200000    # 2006-03-21; earlier timestamp_ms values are junk
+
+
+def snowflake_ms(tweet_id):
+    """The creation time (epoch ms) in a snowflake tweet id, or None for older, sequential ids."""
+    if isinstance(tweet_id, int) and tweet_id >= 1 << 40:
+        return (tweet_id >> 22) + TWITTER_EPOCH_MS
+    return None
+
+
+def tweet_ts(record):
+    """
+    A tweet record's timestamp_ms, else (missing, or before FIRST_TWEET_MS)
+    the time in its id (snowflake_ms), else None.
+    """
+    ts = record.get("timestamp_ms")
+    if ts is not None and int(ts) >= FIRST_TWEET_MS:
+        return int(ts)
+    return snowflake_ms(record.get("id"))